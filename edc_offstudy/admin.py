@@ -4,6 +4,7 @@ from edc_model_admin.history import SimpleHistoryAdmin
 
 from .admin_site import edc_offstudy_admin
 from .models import SubjectOffstudy
+from .paginator import EstimatedCountPaginator
 
 
 @admin.register(SubjectOffstudy, site=edc_offstudy_admin)
@@ -33,8 +34,28 @@ class SubjectOffstudyAdmin(ModelAdminSubjectDashboardMixin, SimpleHistoryAdmin):
         ],
     )
 
+    # avoid calling __str__ per row, see list_display
+    list_display = (
+        "subject_identifier",
+        "dashboard",
+        "offstudy_datetime",
+        "offstudy_reason",
+        "site",
+    )
+
     list_filter = ("offstudy_datetime",)
 
+    list_select_related = ("site",)
+
+    # backed by the (offstudy_datetime, subject_identifier) index
+    date_hierarchy = "offstudy_datetime"
+
+    ordering = ("-offstudy_datetime",)
+
+    paginator = EstimatedCountPaginator
+
+    show_full_result_count = False
+
     radio_fields = {
         "offstudy_reason": admin.VERTICAL,
     }
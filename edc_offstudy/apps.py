@@ -6,3 +6,10 @@ class AppConfig(DjangoAppConfig):
     verbose_name = "Edc Offstudy"
     has_exportable_data = True
     include_in_administration_section = False
+
+    def ready(self):
+        from .signals import (  # noqa
+            offstudy_model_on_post_delete,
+            offstudy_model_on_post_save,
+            offstudy_on_setting_changed,
+        )
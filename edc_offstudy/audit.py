@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from typing import IO, Iterable, Iterator, NamedTuple, Type
+
+from django.apps import apps as django_apps
+from django.db import connections, models
+from django.db.models import F
+from edc_visit_tracking.model_mixins import get_related_visit_model_attr
+
+from .model_mixins import OffstudyCrfModelMixin, OffstudyNonCrfModelMixin
+from .utils import get_offstudy_datetime_subquery
+
+AUDIT_CHUNK_SIZE = 2000
+# model fields used as the report_datetime, in order of preference.
+# e.g. Appointment declares report_datetime as a property of appt_datetime
+REPORT_DATETIME_FIELDS = ["report_datetime", "appt_datetime"]
+
+
+class OffstudyAuditError(Exception):
+    pass
+
+
+class OffstudyViolation(NamedTuple):
+    model: str
+    pk: str
+    subject_identifier: str
+    report_datetime: datetime
+    offstudy_datetime: datetime
+
+
+def get_audit_models(labels: Iterable[str] | None = None) -> list[Type[models.Model]]:
+    """Returns concrete models declared with OffstudyCrfModelMixin or
+    OffstudyNonCrfModelMixin, optionally limited to `labels`
+    (label_lower).
+    """
+    labels = [label.lower() for label in labels or []]
+    audit_models = [
+        model_cls
+        for model_cls in django_apps.get_models()
+        if issubclass(model_cls, (OffstudyCrfModelMixin, OffstudyNonCrfModelMixin))
+        and not model_cls._meta.proxy
+    ]
+    if labels:
+        unknown = set(labels).difference([m._meta.label_lower for m in audit_models])
+        if unknown:
+            raise OffstudyAuditError(
+                f"Not an off-study enforced model. Got {', '.join(sorted(unknown))}."
+            )
+        audit_models = [m for m in audit_models if m._meta.label_lower in labels]
+    return audit_models
+
+
+def get_audit_lookups(model_cls: Type[models.Model]) -> tuple[str, str]:
+    """Returns a tuple of (subject_identifier lookup, report_datetime
+    field name) for the model.
+
+    CRFs get subject_identifier through the related visit.
+    """
+    field_names = [f.name for f in model_cls._meta.concrete_fields]
+    if "subject_identifier" in field_names:
+        subject_identifier_lookup = "subject_identifier"
+    elif issubclass(model_cls, OffstudyCrfModelMixin):
+        subject_identifier_lookup = (
+            f"{get_related_visit_model_attr(model_cls)}__subject_identifier"
+        )
+    else:
+        raise OffstudyAuditError(f"Model has no subject_identifier. Got {model_cls}.")
+    try:
+        report_datetime_field = [f for f in REPORT_DATETIME_FIELDS if f in field_names][0]
+    except IndexError:
+        raise OffstudyAuditError(
+            f"Model has no report datetime field. Expected one of "
+            f"{REPORT_DATETIME_FIELDS}. Got {model_cls}."
+        )
+    return subject_identifier_lookup, report_datetime_field
+
+
+def iter_offstudy_violations(
+    model_cls: Type[models.Model],
+    chunk_size: int | None = None,
+    filter_kwargs: dict | None = None,
+) -> Iterator[OffstudyViolation]:
+    """Yields a violation for each instance of `model_cls` with a
+    report datetime after the subject's offstudy_datetime, in pk
+    order.
+
+    The comparison is done in the database with a correlated
+    subquery on the off-study table. Rows are streamed with
+    `iterator()` so memory does not grow with the size of the
+    table.
+
+    `filter_kwargs`, if any, further filter the model, e.g. by site.
+    """
+    subject_identifier_lookup, report_datetime_field = get_audit_lookups(model_cls)
+    queryset = (
+        model_cls._default_manager.annotate(
+            audit_offstudy_datetime=get_offstudy_datetime_subquery(subject_identifier_lookup)
+        )
+        .filter(
+            audit_offstudy_datetime__isnull=False,
+            **{f"{report_datetime_field}__gt": F("audit_offstudy_datetime")},
+            **(filter_kwargs or {}),
+        )
+        .order_by("pk")
+        .values_list(
+            "pk",
+            subject_identifier_lookup,
+            report_datetime_field,
+            "audit_offstudy_datetime",
+        )
+    )
+    label_lower = model_cls._meta.label_lower
+    for pk, subject_identifier, report_datetime, offstudy_datetime in queryset.iterator(
+        chunk_size=chunk_size or AUDIT_CHUNK_SIZE
+    ):
+        yield OffstudyViolation(
+            label_lower, str(pk), subject_identifier, report_datetime, offstudy_datetime
+        )
+
+
+class ViolationWriter:
+    """Writes OffstudyViolations to a stream as CSV or JSONL, one
+    row at a time.
+    """
+
+    formats = ["csv", "jsonl"]
+
+    def __init__(self, stream: IO[str], fmt: str = "csv"):
+        if fmt not in self.formats:
+            raise OffstudyAuditError(f"Invalid format. Expected one of {self.formats}.")
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        self.csv_writer = None
+        if self.fmt == "csv":
+            self.csv_writer = csv.writer(self.stream)
+            self.csv_writer.writerow(OffstudyViolation._fields)
+
+    def write(self, violation: OffstudyViolation) -> None:
+        row = _serialize(violation)
+        if self.csv_writer:
+            self.csv_writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(row._asdict()) + "\n")
+        self.count += 1
+
+
+class AuditTask(NamedTuple):
+    """A model, or one site of a model, to audit."""
+
+    model: str
+    by_site: bool = False
+    site_id: int | None = None
+
+    @property
+    def filter_kwargs(self) -> dict:
+        if not self.by_site:
+            return {}
+        if self.site_id is None:
+            return {"site__isnull": True}
+        return {"site_id": self.site_id}
+
+
+def get_audit_tasks(
+    audit_models: list[Type[models.Model]], by_site: bool | None = None
+) -> list[AuditTask]:
+    """Returns the audit tasks in the order results are written.
+
+    If `by_site`, models with a `site` field are split into one task
+    per site plus one for rows without a site.
+    """
+    site_ids = []
+    if by_site:
+        site_ids = sorted(
+            django_apps.get_model("sites.site").objects.values_list("id", flat=True)
+        )
+    tasks = []
+    for model_cls in sorted(audit_models, key=lambda m: m._meta.label_lower):
+        label_lower = model_cls._meta.label_lower
+        field_names = [f.name for f in model_cls._meta.concrete_fields]
+        if by_site and "site" in field_names:
+            tasks.extend(AuditTask(label_lower, True, site_id) for site_id in site_ids)
+            tasks.append(AuditTask(label_lower, True, None))
+        else:
+            tasks.append(AuditTask(label_lower))
+    return tasks
+
+
+def run_audit_task(task: AuditTask, chunk_size: int, path: str) -> int:
+    """Writes the violations for one task to `path` as JSONL and
+    returns the number of violations.
+
+    Runs in a worker process. Django's connection handler opens a
+    new connection for this process on first use.
+    """
+    count = 0
+    with open(path, "w") as f:
+        for violation in iter_offstudy_violations(
+            django_apps.get_model(task.model),
+            chunk_size=chunk_size,
+            filter_kwargs=task.filter_kwargs,
+        ):
+            f.write(json.dumps(_serialize(violation)._asdict()) + "\n")
+            count += 1
+    return count
+
+
+def run_audit(
+    writer: ViolationWriter,
+    audit_models: list[Type[models.Model]],
+    chunk_size: int | None = None,
+    workers: int | None = None,
+    by_site: bool | None = None,
+) -> int:
+    """Audits `audit_models` and writes violations to `writer`.
+    Returns the number of violations.
+
+    With more than one worker, tasks run in a pool of forked
+    processes, each with its own database connection. Each worker
+    writes its task to a temporary file. The files are copied to
+    `writer` in task order so output does not depend on which
+    worker finishes first.
+    """
+    chunk_size = chunk_size or AUDIT_CHUNK_SIZE
+    tasks = get_audit_tasks(audit_models, by_site=by_site)
+    if not workers or workers <= 1:
+        for task in tasks:
+            for violation in iter_offstudy_violations(
+                django_apps.get_model(task.model),
+                chunk_size=chunk_size,
+                filter_kwargs=task.filter_kwargs,
+            ):
+                writer.write(violation)
+        return writer.count
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise OffstudyAuditError("Parallel audit requires the `fork` start method.")
+    # forked workers must not share the parent's connections.
+    # (in-memory SQLite connections are not closed and are copied
+    # with the process)
+    connections.close_all()
+    with (
+        TemporaryDirectory() as tmpdir,
+        ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor,
+    ):
+        futures = [
+            executor.submit(
+                run_audit_task, task, chunk_size, os.path.join(tmpdir, f"{index}.jsonl")
+            )
+            for index, task in enumerate(tasks)
+        ]
+        for index, future in enumerate(futures):
+            future.result()
+            path = os.path.join(tmpdir, f"{index}.jsonl")
+            with open(path) as f:
+                for line in f:
+                    writer.write(_deserialize(OffstudyViolation(**json.loads(line))))
+            os.remove(path)
+    return writer.count
+
+
+def _serialize(violation: OffstudyViolation) -> OffstudyViolation:
+    return violation._replace(
+        report_datetime=violation.report_datetime.isoformat(),
+        offstudy_datetime=violation.offstudy_datetime.isoformat(),
+    )
+
+
+def _deserialize(violation: OffstudyViolation) -> OffstudyViolation:
+    return violation._replace(
+        report_datetime=datetime.fromisoformat(violation.report_datetime),
+        offstudy_datetime=datetime.fromisoformat(violation.offstudy_datetime),
+    )
@@ -0,0 +1,207 @@
+"""Bulk close-out: takes many subjects off study at once, e.g. at
+the end of the trial.
+
+Schedule state is loaded for each batch of subjects with `IN`
+queries per onschedule and offschedule model, see
+`SubjectScheduleStatus.for_subjects`. Each batch is saved in its own
+transaction with a savepoint per subject, so a subject that fails,
+for any exception, is reported with the exception's class name and
+the run continues. Subjects not on any schedule, e.g. a mistyped
+subject identifier, are reported as failed and not saved.
+
+Off-study reports are saved with `save()` and not `bulk_create` so
+the action item, history and the Offstudy model signals (status
+model, caches, events) are the same as for a report entered on the
+form.
+
+The off-study report is saved with the site of the subject's
+onschedule model instances, if the model has a site.
+
+With `off_schedule=True`, each subject is first taken off any
+schedule not yet closed, as of the off-study datetime, in the same
+savepoint as the off-study report.
+
+With `dry_run=True`, each batch is validated and saved as above and
+then rolled back.
+
+Committed batches are kept. Subjects already off study are skipped,
+so an interrupted run resumes by running it again.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from edc_model.validators import datetime_not_future
+from edc_protocol.validators import datetime_not_before_study_start
+from edc_visit_tracking.constants import COMPLETED_PROTOCOL_VISIT
+
+from .subject_schedule_status import SubjectScheduleStatus
+from .utils import get_offstudy_model_cls
+
+CLOSEOUT_BATCH_SIZE = 500
+
+CREATED = "created"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class CloseoutRow(NamedTuple):
+    subject_identifier: str
+    status: str
+    message: str
+    # schedules the subject was taken off, `visit_schedule.schedule`
+    schedules: tuple[str, ...] = ()
+
+
+@dataclass
+class CloseoutResult:
+    rows: list[CloseoutRow] = field(default_factory=list)
+    dry_run: bool = False
+    duration: float = 0.0
+
+    def count(self, status: str) -> int:
+        return len([row for row in self.rows if row.status == status])
+
+    @property
+    def created(self) -> int:
+        return self.count(CREATED)
+
+    @property
+    def skipped(self) -> int:
+        return self.count(SKIPPED)
+
+    @property
+    def failed(self) -> int:
+        return self.count(FAILED)
+
+    @property
+    def offschedule(self) -> int:
+        return sum(len(row.schedules) for row in self.rows if row.status == CREATED)
+
+    @property
+    def failures(self) -> list[CloseoutRow]:
+        return [row for row in self.rows if row.status == FAILED]
+
+    def summary(self) -> str:
+        summary = (
+            f"{self.created} created, {self.skipped} skipped, {self.failed} failed, "
+            f"{self.offschedule} schedules closed in {self.duration:.1f}s."
+        )
+        return f"Dry run, rolled back. {summary}" if self.dry_run else summary
+
+
+def close_out_subjects(
+    subject_identifiers: Iterable[str],
+    offstudy_datetime: datetime,
+    offstudy_reason: str | None = None,
+    comment: str | None = None,
+    batch_size: int | None = None,
+    callback: Callable[[list[CloseoutRow]], None] | None = None,
+    off_schedule: bool | None = None,
+    dry_run: bool | None = None,
+) -> CloseoutResult:
+    """Takes the subjects off study, and off schedule if
+    `off_schedule`, and returns a CloseoutResult with one row per
+    subject.
+
+    `callback`, if given, is called with the rows of each batch
+    once the batch is committed, or rolled back if `dry_run`, e.g.
+    to report progress.
+
+    Raises ValidationError if `offstudy_datetime` is before the
+    study start or in the future.
+    """
+    datetime_not_before_study_start(offstudy_datetime)
+    datetime_not_future(offstudy_datetime)
+    offstudy_reason = offstudy_reason or COMPLETED_PROTOCOL_VISIT
+    batch_size = batch_size or CLOSEOUT_BATCH_SIZE
+    subject_identifiers = list(dict.fromkeys(subject_identifiers))
+    result = CloseoutResult(dry_run=bool(dry_run))
+    start = time.monotonic()
+    for index in range(0, len(subject_identifiers), batch_size):
+        rows = close_out_batch(
+            subject_identifiers[index : index + batch_size],
+            offstudy_datetime=offstudy_datetime,
+            offstudy_reason=offstudy_reason,
+            comment=comment,
+            off_schedule=off_schedule,
+            dry_run=dry_run,
+        )
+        result.rows.extend(rows)
+        if callback:
+            callback(rows)
+    result.duration = time.monotonic() - start
+    return result
+
+
+def close_out_batch(
+    subject_identifiers: list[str],
+    offstudy_datetime: datetime,
+    offstudy_reason: str,
+    comment: str | None = None,
+    off_schedule: bool | None = None,
+    dry_run: bool | None = None,
+) -> list[CloseoutRow]:
+    """Takes one batch of subjects off study in one transaction and
+    returns a CloseoutRow per subject.
+    """
+    model_cls = get_offstudy_model_cls()
+    has_site = "site" in [f.name for f in model_cls._meta.get_fields()]
+    rows = []
+    with transaction.atomic():
+        offstudy_subject_identifiers = set(
+            model_cls.objects.filter(subject_identifier__in=subject_identifiers).values_list(
+                "subject_identifier", flat=True
+            )
+        )
+        statuses = SubjectScheduleStatus.for_subjects(
+            [s for s in subject_identifiers if s not in offstudy_subject_identifiers],
+            chunk_size=len(subject_identifiers),
+        )
+        for subject_identifier in subject_identifiers:
+            if subject_identifier in offstudy_subject_identifiers:
+                rows.append(CloseoutRow(subject_identifier, SKIPPED, "Already off study"))
+                continue
+            subject_schedule_status = statuses[subject_identifier]
+            if not subject_schedule_status.onschedule_models:
+                rows.append(
+                    CloseoutRow(
+                        subject_identifier,
+                        FAILED,
+                        "Not on any schedule. Check the subject identifier.",
+                    )
+                )
+                continue
+            schedules = []
+            try:
+                with transaction.atomic():
+                    if off_schedule:
+                        schedules = subject_schedule_status.take_off_all_schedules(
+                            offstudy_datetime
+                        )
+                    obj = model_cls(
+                        subject_identifier=subject_identifier,
+                        offstudy_datetime=offstudy_datetime,
+                        offstudy_reason=offstudy_reason,
+                        comment=comment,
+                    )
+                    if has_site and subject_schedule_status.site_id:
+                        obj.site_id = subject_schedule_status.site_id
+                    obj.subject_schedule_status = subject_schedule_status
+                    obj.save()
+            except Exception as e:
+                message = "; ".join(e.messages) if isinstance(e, ValidationError) else str(e)
+                rows.append(
+                    CloseoutRow(subject_identifier, FAILED, f"{type(e).__name__}: {message}")
+                )
+            else:
+                rows.append(CloseoutRow(subject_identifier, CREATED, "", tuple(schedules)))
+        if dry_run:
+            transaction.set_rollback(True)
+    return rows
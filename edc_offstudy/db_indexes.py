@@ -0,0 +1,68 @@
+"""Indexes added on PostgreSQL only, e.g. covering indexes.
+
+Declared in Meta.indexes, an index with `include` is ignored with
+warning models.W040 on backends without covering indexes and, on
+MySQL and SQLite, duplicates the unique index on subject_identifier.
+Add it with a migration operation instead, for example:
+
+    from django.db import models
+    from edc_offstudy.db_indexes import AddPostgreSQLIndex
+
+    class Migration(migrations.Migration):
+        dependencies = [...]
+        operations = [
+            AddPostgreSQLIndex(
+                "subjectoffstudy",
+                models.Index(
+                    fields=["subject_identifier"],
+                    include=["offstudy_datetime"],
+                    name="my_app_offstudy_sid_idx",
+                ),
+            ),
+        ]
+"""
+
+from __future__ import annotations
+
+from django.db import models
+from django.db.migrations.operations.base import Operation
+
+
+class AddPostgreSQLIndex(Operation):
+    """Migration operation to add an index if the database is
+    PostgreSQL.
+
+    Does nothing on other backends. The index is not added to the
+    model state, so it is not in Meta.indexes and makemigrations
+    does not remove it.
+    """
+
+    reversible = True
+    reduces_to_sql = False
+
+    def __init__(self, model_name: str, index: models.Index):
+        self.model_name = model_name
+        self.index = index
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.model_name, self.index], {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            model = to_state.apps.get_model(app_label, self.model_name)
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            model = from_state.apps.get_model(app_label, self.model_name)
+            schema_editor.remove_index(model, self.index)
+
+    def describe(self):
+        return f"Create PostgreSQL index {self.index.name} on {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.index.name.lower()}"
@@ -0,0 +1,158 @@
+"""PostgreSQL triggers that reject rows reported after the subject's
+off-study datetime.
+
+Opt in with settings.EDC_OFFSTUDY_DB_TRIGGERS=True and a project
+migration, for example:
+
+    from edc_offstudy.db_triggers import InstallOffstudyTrigger
+
+    class Migration(migrations.Migration):
+        dependencies = [...]
+        operations = [
+            InstallOffstudyTrigger("my_app.crfone"),
+            InstallOffstudyTrigger("my_app.subjectvisit"),
+        ]
+
+On other backends the operations do nothing and the Python checks
+in the model mixins apply as before. With the triggers enabled, the
+model mixins and OffstudyQuerySetMixin skip the Python check, for
+models with an installed trigger, and raise OffstudyError if the
+trigger rejects the row.
+"""
+
+from __future__ import annotations
+
+from typing import Type
+
+from django.apps import apps as django_apps
+from django.db import models
+from django.db.migrations.operations.base import Operation
+from edc_visit_tracking.model_mixins import get_related_visit_model_attr
+
+from .audit import get_audit_lookups, get_audit_models
+from .utils import (
+    OFFSTUDY_TRIGGER_MESSAGE_PREFIX,
+    get_installed_offstudy_triggers,
+    get_offstudy_model_cls,
+    get_trigger_name,
+)
+
+TRIGGER_MESSAGE = (
+    "Subject off study by given date/time. Got subject_identifier=%, "
+    "report_datetime=%, offstudy_datetime=%. See %."
+)
+
+
+def get_create_trigger_sql(model_cls: Type[models.Model], quote_name) -> list[str]:
+    """Returns SQL statements to create the trigger function and
+    trigger for the model's table.
+
+    The trigger runs before insert or update of each row and raises
+    a `check_violation` if the row's report datetime is after the
+    subject's offstudy_datetime. CRFs read subject_identifier from
+    the related visit.
+    """
+    subject_identifier_lookup, report_datetime_field = get_audit_lookups(model_cls)
+    report_datetime_column = model_cls._meta.get_field(report_datetime_field).column
+    if subject_identifier_lookup == "subject_identifier":
+        subject_identifier_sql = "_subject_identifier := NEW.subject_identifier;"
+    else:
+        fk = model_cls._meta.get_field(get_related_visit_model_attr(model_cls))
+        visit_meta = fk.related_model._meta
+        # identifiers are quoted with quote_name, nothing is user input
+        subject_identifier_sql = (
+            f"SELECT subject_identifier INTO _subject_identifier "  # nosec B608
+            f"FROM {quote_name(visit_meta.db_table)} "
+            f"WHERE {quote_name(visit_meta.pk.column)} = NEW.{quote_name(fk.column)};"
+        )
+    name = get_trigger_name(model_cls)
+    offstudy_table = get_offstudy_model_cls()._meta.db_table
+    # identifiers are quoted with quote_name, the literals are the
+    # model label and constants, nothing is user input
+    return [
+        f"""CREATE OR REPLACE FUNCTION {quote_name(name)}() RETURNS trigger AS $$
+DECLARE
+    _subject_identifier varchar;
+    _offstudy_datetime timestamp with time zone;
+BEGIN
+    IF NEW.{quote_name(report_datetime_column)} IS NULL THEN
+        RETURN NEW;
+    END IF;
+    {subject_identifier_sql}
+    SELECT offstudy_datetime INTO _offstudy_datetime
+        FROM {quote_name(offstudy_table)}
+        WHERE subject_identifier = _subject_identifier LIMIT 1;
+    IF _offstudy_datetime IS NOT NULL
+        AND NEW.{quote_name(report_datetime_column)} > _offstudy_datetime THEN
+        RAISE EXCEPTION '{OFFSTUDY_TRIGGER_MESSAGE_PREFIX}{TRIGGER_MESSAGE}',
+            _subject_identifier, NEW.{quote_name(report_datetime_column)},
+            _offstudy_datetime, '{model_cls._meta.label_lower}'
+            USING ERRCODE = 'check_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql""",  # nosec B608
+        f"DROP TRIGGER IF EXISTS {quote_name(name)} "
+        f"ON {quote_name(model_cls._meta.db_table)}",
+        f"CREATE TRIGGER {quote_name(name)} BEFORE INSERT OR UPDATE "
+        f"ON {quote_name(model_cls._meta.db_table)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {quote_name(name)}()",
+    ]
+
+
+def get_drop_trigger_sql(model_cls: Type[models.Model], quote_name) -> list[str]:
+    name = get_trigger_name(model_cls)
+    return [
+        f"DROP TRIGGER IF EXISTS {quote_name(name)} "
+        f"ON {quote_name(model_cls._meta.db_table)}",
+        f"DROP FUNCTION IF EXISTS {quote_name(name)}()",
+    ]
+
+
+class InstallOffstudyTrigger(Operation):
+    """Migration operation to install the off-study trigger for a
+    model declared with OffstudyCrfModelMixin or
+    OffstudyNonCrfModelMixin.
+
+    Does nothing unless the database is PostgreSQL. Uses the current
+    model class, not the historical model, since the trigger reads
+    the registered off-study model.
+    """
+
+    reversible = True
+    reduces_to_sql = False
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.model], {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(schema_editor, get_create_trigger_sql)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(schema_editor, get_drop_trigger_sql)
+
+    def _execute(self, schema_editor, get_sql) -> None:
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        model_cls = django_apps.get_model(self.model)
+        for sql in get_sql(model_cls, schema_editor.quote_name):
+            schema_editor.execute(sql, params=None)
+        get_installed_offstudy_triggers.cache_clear()
+
+    def describe(self):
+        return f"Install off-study trigger for {self.model}"
+
+
+def get_offstudy_trigger_operations() -> list[InstallOffstudyTrigger]:
+    """Returns an InstallOffstudyTrigger operation for each model
+    declared with OffstudyCrfModelMixin or OffstudyNonCrfModelMixin.
+
+    Use to list the operations for a project migration.
+    """
+    return [InstallOffstudyTrigger(m._meta.label_lower) for m in get_audit_models()]
@@ -0,0 +1,299 @@
+"""A "subject went off study" event, sent after the off-study
+report is committed.
+
+Receivers of `subject_offstudy` get one event per save. To handle
+events in bulk instead, configure a dispatcher and connect to
+`subject_offstudy_batch`:
+
+    # settings.py
+    EDC_OFFSTUDY_EVENT_DISPATCHER = "edc_offstudy.events.QueueDispatcher"
+    EDC_OFFSTUDY_EVENT_DISPATCHER_OPTIONS = {"batch_size": 100}
+
+    # receivers.py
+    @receiver(subject_offstudy_batch)
+    def refresh_reports(sender, events, **kwargs):
+        ...
+
+`QueueDispatcher` batches in process. `FileQueueDispatcher` appends
+events to a JSONL file shared by processes on the same host, for a
+consumer to flush, e.g. `python manage.py flush_offstudy_events`.
+
+An exception raised by a receiver of `subject_offstudy` or by the
+dispatcher is logged to logger `edc_offstudy.events` and not raised,
+since the off-study report is already committed.
+"""
+
+from __future__ import annotations
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+
+from .utils import get_uncommitted
+
+if TYPE_CHECKING:
+    from .model_mixins import OffstudyModelMixin
+
+logger = logging.getLogger(__name__)
+
+# sent after commit with kwarg `event`
+subject_offstudy = Signal()
+
+# sent by a dispatcher on flush with kwarg `events`
+subject_offstudy_batch = Signal()
+
+
+class OffstudyEventError(Exception):
+    pass
+
+
+class OffstudyEvent(NamedTuple):
+    subject_identifier: str
+    offstudy_datetime: datetime
+    model: str
+    pk: str
+    created: bool
+
+    @classmethod
+    def from_instance(cls, instance: OffstudyModelMixin, created: bool) -> OffstudyEvent:
+        return cls(
+            instance.subject_identifier,
+            instance.offstudy_datetime,
+            instance._meta.label_lower,
+            str(instance.pk),
+            created,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            self._replace(offstudy_datetime=self.offstudy_datetime.isoformat())._asdict()
+        )
+
+    @classmethod
+    def from_json(cls, value: str) -> OffstudyEvent:
+        event = cls(**json.loads(value))
+        return event._replace(
+            offstudy_datetime=datetime.fromisoformat(event.offstudy_datetime)
+        )
+
+
+class OffstudyEventDispatcher:
+    """Base class for dispatchers that collect events and send them
+    in bulk with `subject_offstudy_batch`.
+    """
+
+    def dispatch(self, event: OffstudyEvent) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> int:
+        """Sends pending events, if any, and returns the number
+        sent.
+        """
+        raise NotImplementedError
+
+    def send_batch(self, events: list[OffstudyEvent]) -> int:
+        if events:
+            subject_offstudy_batch.send(sender=self.__class__, events=events)
+        return len(events)
+
+
+class QueueDispatcher(OffstudyEventDispatcher):
+    """Collects events in memory and flushes when `batch_size`
+    events are pending or, if `max_delay` is set, `max_delay`
+    seconds after the oldest pending event, from a timer thread.
+
+    Pending events are flushed when the process exits. Call `flush`
+    to send what is pending, e.g. at the end of a job.
+    """
+
+    def __init__(self, batch_size: int | None = None, max_delay: float | None = None):
+        self.batch_size = batch_size or 100
+        self.max_delay = max_delay
+        self.events: list[OffstudyEvent] = []
+        self.timer: threading.Timer | None = None
+        self.lock = threading.Lock()
+        atexit.register(self.flush_and_log)
+
+    def dispatch(self, event: OffstudyEvent) -> None:
+        with self.lock:
+            self.events.append(event)
+            if len(self.events) < self.batch_size:
+                if self.max_delay is not None and not self.timer:
+                    self.timer = threading.Timer(self.max_delay, self.flush_and_log)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> int:
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            events, self.events = self.events, []
+        return self.send_batch(events)
+
+    def flush_and_log(self) -> None:
+        """Flushes and logs an exception instead of raising, for the
+        timer thread and on exit.
+        """
+        try:
+            self.flush()
+        except Exception as e:
+            logger.exception(f"Failed to send off-study events. Got {e}")
+
+
+class FileQueueDispatcher(OffstudyEventDispatcher):
+    """Appends events to a JSONL file. `flush` sends and removes the
+    events in the file.
+
+    Writers and the consumer lock the file so any number of
+    processes on the same host may write. The consumer renames the
+    file before reading so new events go to a new file. If sending
+    fails, the renamed file is left and sent by the next `flush`.
+
+    Requires `fcntl`, so not available on Windows.
+    """
+
+    def __init__(self, path: str | None = None):
+        try:
+            import fcntl  # noqa: F401
+        except ImportError:
+            raise OffstudyEventError(
+                "FileQueueDispatcher requires fcntl, not available on this platform."
+            )
+        self.path = path or getattr(settings, "EDC_OFFSTUDY_EVENT_QUEUE_PATH", None)
+        if not self.path:
+            raise OffstudyEventError(
+                "Expected a path for the event queue. "
+                "See settings.EDC_OFFSTUDY_EVENT_QUEUE_PATH."
+            )
+
+    def dispatch(self, event: OffstudyEvent) -> None:
+        import fcntl
+
+        while True:
+            with open(self.path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # retry if the consumer renamed the file while
+                    # waiting for the lock
+                    if self.is_current(f):
+                        f.write(event.to_json() + "\n")
+                        return
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def is_current(self, f, path: str | None = None) -> bool:
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(path or self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def flush(self) -> int:
+        # files left by a flush that failed or was interrupted first
+        count = 0
+        for processing_path in sorted(glob.glob(f"{glob.escape(self.path)}.*.processing")):
+            count += self.send_file(processing_path, wait=False)
+        processing_path = f"{self.path}.{os.getpid()}.{uuid.uuid4().hex}.processing"
+        try:
+            os.rename(self.path, processing_path)
+        except FileNotFoundError:
+            return count
+        return count + self.send_file(processing_path, wait=True)
+
+    def send_file(self, path: str, wait: bool) -> int:
+        """Sends and removes the events in a renamed file.
+
+        Holds the lock until the file is removed. If not `wait`,
+        skips a file locked by another consumer.
+        """
+        import fcntl
+
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            return 0
+        with f:
+            try:
+                # if `wait`, waits for writers that opened the file
+                # before the rename
+                fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            # removed by another consumer while waiting for the lock
+            if not self.is_current(f, path):
+                return 0
+            events = [OffstudyEvent.from_json(line) for line in f if line.strip()]
+            count = self.send_batch(events)
+            os.remove(path)
+        return count
+
+
+@lru_cache(maxsize=1)
+def get_offstudy_event_dispatcher() -> OffstudyEventDispatcher | None:
+    """Returns the dispatcher set in
+    settings.EDC_OFFSTUDY_EVENT_DISPATCHER, if any.
+
+    Cleared by the `setting_changed` signal, see signals.
+    """
+    dispatcher = getattr(settings, "EDC_OFFSTUDY_EVENT_DISPATCHER", None)
+    if not dispatcher:
+        return None
+    options = getattr(settings, "EDC_OFFSTUDY_EVENT_DISPATCHER_OPTIONS", None) or {}
+    return import_string(dispatcher)(**options)
+
+
+def send_offstudy_event(event: OffstudyEvent) -> None:
+    """Sends `subject_offstudy` and passes the event to the
+    dispatcher, if any.
+    """
+    for receiver, response in subject_offstudy.send_robust(sender=OffstudyEvent, event=event):
+        if isinstance(response, Exception):
+            logger.error(
+                f"Receiver {receiver} failed on off-study event {event}. Got {response}",
+                exc_info=response,
+            )
+    if dispatcher := get_offstudy_event_dispatcher():
+        try:
+            dispatcher.dispatch(event)
+        except Exception as e:
+            logger.exception(f"Failed to dispatch off-study event {event}. Got {e}")
+
+
+def send_offstudy_event_on_commit(
+    instance: OffstudyModelMixin, created: bool, using: str | None = None
+) -> None:
+    """Sends the event for `instance` once the transaction commits.
+
+    An instance saved more than once in a transaction, e.g. by the
+    action item, sends one event with the last saved values.
+    """
+    event = OffstudyEvent.from_instance(instance, created)
+    key = (event.model, event.pk)
+    # latest event waiting on commit on this connection by (model, pk)
+    pending_events: dict[tuple[str, str], OffstudyEvent] = get_uncommitted(
+        using, "events", dict
+    )
+    if pending_event := pending_events.get(key):
+        event = event._replace(created=pending_event.created or created)
+    pending_events[key] = event
+
+    def on_commit():
+        if pending_events.get(key) is event:
+            del pending_events[key]
+            send_offstudy_event(event)
+
+    transaction.on_commit(on_commit, using=using)
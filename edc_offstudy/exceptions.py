@@ -1,5 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+
 class OffstudyError(Exception):
-    pass
+    """Raised if a model instance is reported after the subject's
+    off-study datetime.
+
+    Attributes `subject_identifier`, `report_datetime`,
+    `offstudy_datetime` and `source_model` (label_lower) are set
+    if known. If no message is given, the message is rendered from
+    the attributes on first use, e.g. `str(e)`, so callers that
+    collect many errors do not pay to format them.
+    """
+
+    def __init__(
+        self,
+        message: str | None = None,
+        subject_identifier: str | None = None,
+        report_datetime: datetime | None = None,
+        offstudy_datetime: datetime | None = None,
+        source_model: str | None = None,
+    ):
+        super().__init__(*([] if message is None else [message]))
+        self._message = message
+        self.subject_identifier = subject_identifier
+        self.report_datetime = report_datetime
+        self.offstudy_datetime = offstudy_datetime
+        self.source_model = source_model
+
+    def __str__(self) -> str:
+        return self.message
+
+    @property
+    def message(self) -> str:
+        if self._message is None:
+            self._message = self.render_message()
+        return str(self._message)
+
+    def render_message(self) -> str:
+        from django.apps import apps as django_apps
+        from edc_utils import formatted_datetime
+
+        from .utils import get_offstudy_model_cls
+
+        msg_part = ""
+        if self.source_model:
+            verbose_name = django_apps.get_model(self.source_model)._meta.verbose_name
+            msg_part = f"Source model `{verbose_name}`."
+        return (
+            "Subject off study by given date/time. "
+            f"Got report_datetime=`{formatted_datetime(self.report_datetime)}` "
+            f"while the offstudy date is `{formatted_datetime(self.offstudy_datetime)}` "
+            f"Subject {self.subject_identifier}. {msg_part} "
+            f"See also '{get_offstudy_model_cls()._meta.verbose_name}'."
+        )
+
+
+class OffstudyBatchError(OffstudyError):
+    """Raised for a batch of model instances if any are reported
+    after the subject's off-study datetime.
+
+    Attribute `objs` lists the offending instances and `errors` an
+    OffstudyError for each, in the same order. If no message is
+    given, the message is rendered on first use.
+    """
+
+    def __init__(self, message=None, objs=None, errors=None):
+        super().__init__(message)
+        self.objs = objs or []
+        self.errors = errors or []
+
+    def render_message(self) -> str:
+        from edc_utils import formatted_datetime
+
+        from .utils import get_offstudy_model_cls
+
+        offending = "; ".join(
+            f"{e.source_model} {e.subject_identifier} {formatted_datetime(e.report_datetime)}"
+            for e in self.errors
+        )
+        return (
+            f"Subject off study by given date/time. Got {len(self.errors)} "
+            f"instance(s) reported after the offstudy date. "
+            f"See also '{get_offstudy_model_cls()._meta.verbose_name}'. Got {offending}."
+        )
 
 
 class OffstudyNonCrfModelformError(Exception):
@@ -0,0 +1,187 @@
+"""Instrumentation of the off-study checks.
+
+Records call counts, query counts, off-study cache hits and wall
+time per check and source model. Off unless a sink is set:
+
+    EDC_OFFSTUDY_INSTRUMENTATION_SINK = "edc_offstudy.instrumentation.StatsdSink"
+    EDC_OFFSTUDY_INSTRUMENTATION_SINK_OPTIONS = {"port": 8125}
+
+When off, `instrument` returns a shared no-op context manager.
+"""
+
+from __future__ import annotations
+
+import logging
+import socket
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .request_cache import get_offstudy_cache
+
+_null_context = nullcontext()
+
+
+class OffstudyMetric(NamedTuple):
+    name: str
+    model: str | None
+    duration: float
+    queries: int
+    cache_hits: int
+    error: bool
+
+
+class LoggingSink:
+    """Logs each metric to logger `edc_offstudy.instrumentation`."""
+
+    def __init__(self, logger_name: str | None = None, level: int | None = None):
+        self.logger = logging.getLogger(logger_name or "edc_offstudy.instrumentation")
+        self.level = logging.DEBUG if level is None else level
+
+    def record(self, metric: OffstudyMetric) -> None:
+        self.logger.log(
+            self.level,
+            "%s model=%s duration=%.3fms queries=%s cache_hits=%s error=%s",
+            metric.name,
+            metric.model,
+            metric.duration * 1000,
+            metric.queries,
+            metric.cache_hits,
+            metric.error,
+        )
+
+
+class MemorySink:
+    """Keeps metrics in memory, e.g. for tests."""
+
+    def __init__(self):
+        self.metrics: list[OffstudyMetric] = []
+
+    def record(self, metric: OffstudyMetric) -> None:
+        self.metrics.append(metric)
+
+    def clear(self) -> None:
+        self.metrics = []
+
+    def summary(self) -> dict[tuple[str, str | None], dict]:
+        """Returns totals by (name, model)."""
+        summary = {}
+        for metric in self.metrics:
+            totals = summary.setdefault(
+                (metric.name, metric.model),
+                dict(calls=0, duration=0.0, queries=0, cache_hits=0, errors=0),
+            )
+            totals["calls"] += 1
+            totals["duration"] += metric.duration
+            totals["queries"] += metric.queries
+            totals["cache_hits"] += metric.cache_hits
+            totals["errors"] += int(metric.error)
+        return summary
+
+
+class StatsdSink:
+    """Sends each metric as StatsD counters and a timer over UDP,
+    e.g. to a local agent.
+
+    Send errors are ignored.
+    """
+
+    def __init__(
+        self, host: str | None = None, port: int | None = None, prefix: str | None = None
+    ):
+        self.address = (host or "127.0.0.1", port or 8125)
+        self.prefix = prefix or "edc_offstudy"
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def record(self, metric: OffstudyMetric) -> None:
+        model = (metric.model or "none").replace(".", "_")
+        name = f"{self.prefix}.{metric.name}.{model}"
+        lines = [
+            f"{name}.calls:1|c",
+            f"{name}.time:{metric.duration * 1000:.3f}|ms",
+            f"{name}.queries:{metric.queries}|c",
+            f"{name}.cache_hits:{metric.cache_hits}|c",
+        ]
+        if metric.error:
+            lines.append(f"{name}.errors:1|c")
+        try:
+            self.socket.sendto("\n".join(lines).encode(), self.address)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=1)
+def get_instrumentation_sink():
+    """Returns the sink set in settings.EDC_OFFSTUDY_INSTRUMENTATION_SINK
+    or None.
+
+    Cleared by the `setting_changed` signal, see signals.
+    """
+    sink = getattr(settings, "EDC_OFFSTUDY_INSTRUMENTATION_SINK", None)
+    if not sink:
+        return None
+    options = getattr(settings, "EDC_OFFSTUDY_INSTRUMENTATION_SINK_OPTIONS", None) or {}
+    return import_string(sink)(**options)
+
+
+class Measurement:
+    """Context manager that measures one check and records an
+    OffstudyMetric to the sink on exit.
+    """
+
+    def __init__(self, sink, name: str, model: str | None):
+        self.sink = sink
+        self.name = name
+        self.model = model
+        self.queries = 0
+        self.cache = None
+        self.cache_hits = 0
+        self.start = None
+        self.execute_wrapper = None
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.cache = get_offstudy_cache()
+        self.cache_hits = self.cache.hits if self.cache else 0
+        self.execute_wrapper = connection.execute_wrapper(self.count_query)
+        self.execute_wrapper.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        self.execute_wrapper.__exit__(exc_type, exc_value, traceback)
+        self.sink.record(
+            OffstudyMetric(
+                self.name,
+                self.model,
+                duration,
+                self.queries,
+                (self.cache.hits - self.cache_hits) if self.cache else 0,
+                exc_type is not None,
+            )
+        )
+        return False
+
+
+def instrument(name: str, model: str | None = None):
+    """Returns a context manager that measures the block, if a sink
+    is set, otherwise a no-op.
+
+    For example:
+        with instrument("save", self._meta.label_lower):
+            ...
+    """
+    sink = get_instrumentation_sink()
+    if sink is None:
+        return _null_context
+    return Measurement(sink, name, model)
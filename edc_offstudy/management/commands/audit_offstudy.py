@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...audit import (
+    AUDIT_CHUNK_SIZE,
+    OffstudyAuditError,
+    ViolationWriter,
+    get_audit_models,
+    run_audit,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "List saved CRFs, PRNs, visits, etc with a report datetime after the "
+        "subject's off-study datetime"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="format",
+            choices=ViolationWriter.formats,
+            default="csv",
+            help="Output format. Default: csv",
+        )
+        parser.add_argument(
+            "--output",
+            dest="output",
+            default=None,
+            help="Output file. Default: stdout",
+        )
+        parser.add_argument(
+            "--models",
+            dest="models",
+            nargs="*",
+            default=None,
+            help="Limit to these models (label_lower). Default: all",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=AUDIT_CHUNK_SIZE,
+            help=f"Number of rows fetched per round trip. Default: {AUDIT_CHUNK_SIZE}",
+        )
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Number of worker processes. Default: 1",
+        )
+        parser.add_argument(
+            "--by-site",
+            dest="by_site",
+            action="store_true",
+            default=False,
+            help="Split each model with a `site` field into one task per site",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            audit_models = get_audit_models(options["models"])
+        except OffstudyAuditError as e:
+            raise CommandError(e)
+        if options["output"]:
+            stream = open(options["output"], "w", newline="")
+        else:
+            stream = self.stdout
+        try:
+            writer = ViolationWriter(stream, fmt=options["format"])
+            run_audit(
+                writer,
+                audit_models,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                by_site=options["by_site"],
+            )
+        finally:
+            if options["output"]:
+                stream.close()
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Done. {writer.count} violations in {len(audit_models)} models."
+            )
+        )
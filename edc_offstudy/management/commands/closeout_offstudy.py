@@ -0,0 +1,133 @@
+import csv
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from ...choices import OFFSTUDY_REASONS
+from ...closeout import CLOSEOUT_BATCH_SIZE, SKIPPED, close_out_subjects
+
+
+class Command(BaseCommand):
+    help = (
+        "Take subjects off study in batches, e.g. at the end of the trial. "
+        "Subjects already off study are skipped so the command may be run again "
+        "to resume an interrupted run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subjects",
+            dest="subjects",
+            nargs="*",
+            default=None,
+            help="Subject identifiers",
+        )
+        parser.add_argument(
+            "--subjects-file",
+            dest="subjects_file",
+            default=None,
+            help="File with one subject identifier per line",
+        )
+        parser.add_argument(
+            "--offstudy-datetime",
+            dest="offstudy_datetime",
+            required=True,
+            help="Off-study datetime in ISO format. If naive, in settings.TIME_ZONE",
+        )
+        parser.add_argument(
+            "--reason",
+            dest="reason",
+            choices=[choice[0] for choice in OFFSTUDY_REASONS],
+            default=None,
+            help="Off-study reason. Default: completed protocol",
+        )
+        parser.add_argument(
+            "--comment",
+            dest="comment",
+            default=None,
+            help="Comment saved on each off-study report",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=CLOSEOUT_BATCH_SIZE,
+            help=f"Number of subjects per transaction. Default: {CLOSEOUT_BATCH_SIZE}",
+        )
+        parser.add_argument(
+            "--off-schedule",
+            dest="off_schedule",
+            action="store_true",
+            default=False,
+            help="First take each subject off any schedule not yet closed",
+        )
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            default=False,
+            help="Validate and save each batch, then roll back",
+        )
+        parser.add_argument(
+            "--report",
+            dest="report",
+            default=None,
+            help="CSV file for one row per subject. Default: failures to stderr",
+        )
+
+    def handle(self, *args, **options):
+        subject_identifiers = self.get_subject_identifiers(options)
+        offstudy_datetime = self.get_offstudy_datetime(options["offstudy_datetime"])
+        report = open(options["report"], "w", newline="") if options["report"] else None
+        writer = None
+        if report:
+            writer = csv.writer(report)
+            writer.writerow(["subject_identifier", "status", "message", "schedules"])
+
+        def callback(rows):
+            for row in rows:
+                if writer:
+                    writer.writerow(row._replace(schedules=" ".join(row.schedules)))
+                elif row.message and row.status != SKIPPED:
+                    self.stderr.write(f"{row.subject_identifier}: {row.message}")
+
+        try:
+            result = close_out_subjects(
+                subject_identifiers,
+                offstudy_datetime=offstudy_datetime,
+                offstudy_reason=options["reason"],
+                comment=options["comment"],
+                batch_size=options["batch_size"],
+                callback=callback,
+                off_schedule=options["off_schedule"],
+                dry_run=options["dry_run"],
+            )
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+        finally:
+            if report:
+                report.close()
+        self.stdout.write(self.style.SUCCESS(f"Done. {result.summary()}"))
+
+    @staticmethod
+    def get_subject_identifiers(options) -> list[str]:
+        subject_identifiers = list(options["subjects"] or [])
+        if options["subjects_file"]:
+            with open(options["subjects_file"]) as f:
+                subject_identifiers.extend(line.strip() for line in f if line.strip())
+        if not subject_identifiers:
+            raise CommandError("Expected --subjects or --subjects-file.")
+        return subject_identifiers
+
+    @staticmethod
+    def get_offstudy_datetime(value: str) -> datetime:
+        try:
+            offstudy_datetime = datetime.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid --offstudy-datetime. Got {value}.")
+        if offstudy_datetime.tzinfo is None:
+            offstudy_datetime = offstudy_datetime.replace(tzinfo=ZoneInfo(settings.TIME_ZONE))
+        return offstudy_datetime
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...events import get_offstudy_event_dispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Send pending off-study events in one batch. "
+        "See settings.EDC_OFFSTUDY_EVENT_DISPATCHER"
+    )
+
+    def handle(self, *args, **options):
+        dispatcher = get_offstudy_event_dispatcher()
+        if not dispatcher:
+            raise CommandError(
+                "No event dispatcher. See settings.EDC_OFFSTUDY_EVENT_DISPATCHER."
+            )
+        count = dispatcher.flush()
+        self.stdout.write(self.style.SUCCESS(f"Done. {count} off-study events sent."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ...offstudy_status import rebuild_offstudy_status
+
+
+class Command(BaseCommand):
+    help = "Rebuild the OffstudyStatus model from the Offstudy model"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Number of rows per insert. Default: 1000",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_offstudy_status(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Done. {count} subjects off study."))
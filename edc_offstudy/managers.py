@@ -0,0 +1,73 @@
+from django.db import models
+from django.db.models import BooleanField, Case, F, Value, When
+
+from .audit import get_audit_lookups
+from .utils import (
+    get_offstudy_datetime_subquery,
+    offstudy_db_triggers_enabled,
+    raise_if_offstudy_for_objs,
+    translate_offstudy_trigger_error,
+)
+
+
+class OffstudyQuerySetMixin:
+    """QuerySet mixin for models declared with OffstudyCrfModelMixin
+    or OffstudyNonCrfModelMixin.
+
+    Validates a batch passed to `bulk_create` or `bulk_update` with
+    one query against the Offstudy model instead of skipping the
+    check done in `save`.
+
+    If off-study triggers are enabled, see `db_triggers`, the
+    database does the check instead.
+
+    Use `annotate_offstudy` to flag rows entered after the subject
+    went off study, e.g. in exports and changelists.
+    """
+
+    def annotate_offstudy(self):
+        """Returns the queryset annotated with the subject's
+        `offstudy_datetime` and `is_after_offstudy`, True if the
+        report datetime is after the offstudy_datetime.
+
+        Uses a correlated subquery so the queryset is still a
+        single SQL statement.
+        """
+        subject_identifier_lookup, report_datetime_field = get_audit_lookups(self.model)
+        return self.annotate(
+            offstudy_datetime=get_offstudy_datetime_subquery(subject_identifier_lookup)
+        ).annotate(
+            is_after_offstudy=Case(
+                When(
+                    offstudy_datetime__isnull=False,
+                    **{f"{report_datetime_field}__gt": F("offstudy_datetime")},
+                    then=Value(True),
+                ),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if offstudy_db_triggers_enabled(self.db, model_cls=self.model):
+            with translate_offstudy_trigger_error(using=self.db):
+                return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        raise_if_offstudy_for_objs(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, *args, **kwargs):
+        if offstudy_db_triggers_enabled(self.db, model_cls=self.model):
+            with translate_offstudy_trigger_error(using=self.db):
+                return super().bulk_update(objs, *args, **kwargs)
+        objs = list(objs)
+        raise_if_offstudy_for_objs(objs)
+        return super().bulk_update(objs, *args, **kwargs)
+
+
+class OffstudyQuerySet(OffstudyQuerySetMixin, models.QuerySet):
+    pass
+
+
+class OffstudyManager(models.Manager.from_queryset(OffstudyQuerySet)):
+    pass
@@ -0,0 +1,31 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .request_cache import offstudy_cache
+
+
+class OffstudyCacheMiddleware:
+    """Caches off-study lookups by subject for the duration of
+    the request.
+
+    Supports sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with offstudy_cache():
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        with offstudy_cache():
+            response = await self.get_response(request)
+        return response
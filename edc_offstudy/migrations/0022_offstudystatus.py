@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0021_remove_historicalsubjectoffstudy_consent_model_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OffstudyStatus",
+            fields=[
+                (
+                    "subject_identifier",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("offstudy_datetime", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Off-study status",
+                "verbose_name_plural": "Off-study status",
+                "indexes": [
+                    models.Index(
+                        fields=["subject_identifier", "offstudy_datetime"],
+                        name="edc_offstud_subject_6a597f_idx",
+                    )
+                ],
+            },
+        ),
+    ]
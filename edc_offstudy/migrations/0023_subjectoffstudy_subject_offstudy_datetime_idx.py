@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0022_offstudystatus"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subjectoffstudy",
+            index=models.Index(
+                fields=["subject_identifier", "offstudy_datetime"],
+                name="edc_offstud_subject_4e15fc_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0023_subjectoffstudy_subject_offstudy_datetime_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subjectoffstudy",
+            index=models.Index(
+                fields=["offstudy_datetime", "subject_identifier"],
+                name="edc_offstud_offstud_4b3704_idx",
+            ),
+        ),
+    ]
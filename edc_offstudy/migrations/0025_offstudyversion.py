@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0024_subjectoffstudy_offstudy_datetime_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OffstudyVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Off-study version",
+                "verbose_name_plural": "Off-study version",
+            },
+        ),
+    ]
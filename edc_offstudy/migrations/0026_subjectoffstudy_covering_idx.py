@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0025_offstudyversion"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="subjectoffstudy",
+            name="edc_offstud_subject_4e15fc_idx",
+        ),
+        migrations.AddIndex(
+            model_name="subjectoffstudy",
+            index=models.Index(
+                fields=["subject_identifier"],
+                include=("offstudy_datetime",),
+                name="subjectoffstudy_os_sid_idx",
+            ),
+        ),
+    ]
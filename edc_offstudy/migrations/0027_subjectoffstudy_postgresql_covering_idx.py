@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+from edc_offstudy.db_indexes import AddPostgreSQLIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0026_subjectoffstudy_covering_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="subjectoffstudy",
+            name="subjectoffstudy_os_sid_idx",
+        ),
+        AddPostgreSQLIndex(
+            "subjectoffstudy",
+            models.Index(
+                fields=["subject_identifier"],
+                include=("offstudy_datetime",),
+                name="subjectoffstudy_os_sid_idx",
+            ),
+        ),
+    ]
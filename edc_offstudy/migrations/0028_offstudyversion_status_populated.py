@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+from edc_offstudy.db_indexes import AddPostgreSQLIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_offstudy", "0027_subjectoffstudy_postgresql_covering_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="offstudyversion",
+            name="status_populated",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RemoveIndex(
+            model_name="offstudystatus",
+            name="edc_offstud_subject_6a597f_idx",
+        ),
+        AddPostgreSQLIndex(
+            "offstudystatus",
+            models.Index(
+                fields=["subject_identifier"],
+                include=("offstudy_datetime",),
+                name="offstudystatus_os_sid_idx",
+            ),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from __future__ import annotations
+
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
@@ -8,12 +11,9 @@ from edc_model.validators import datetime_not_future
 from edc_model_fields.fields import OtherCharField
 from edc_protocol.validators import datetime_not_before_study_start
 from edc_utils import convert_php_dateformat, get_utcnow
-from edc_visit_schedule.utils import (
-    off_all_schedules_or_raise,
-    offstudy_datetime_after_all_offschedule_datetimes,
-)
 
 from ..choices import OFFSTUDY_REASONS
+from ..subject_schedule_status import SubjectScheduleStatus
 from ..utils import OffstudyError
 
 
@@ -21,6 +21,16 @@ class OffstudyModelMixinError(ValidationError):
     pass
 
 
+@lru_cache(maxsize=1)
+def get_str_tzinfo_and_format() -> tuple[ZoneInfo, str]:
+    """Returns a tuple of (ZoneInfo, strftime format) used by
+    `OffstudyModelMixin.__str__`.
+
+    Cleared by the `setting_changed` signal, see signals.
+    """
+    return ZoneInfo(settings.TIME_ZONE), convert_php_dateformat(settings.SHORT_DATETIME_FORMAT)
+
+
 class OffstudyModelMixin(UniqueSubjectIdentifierFieldMixin, models.Model):
     """Model mixin for the Off-study model.
 
@@ -35,6 +45,9 @@ class OffstudyModelMixin(UniqueSubjectIdentifierFieldMixin, models.Model):
 
     offstudy_reason_choices = OFFSTUDY_REASONS
 
+    # set by OffstudyModelFormMixin.clean to reuse its schedule lookups
+    subject_schedule_status: SubjectScheduleStatus | None = None
+
     offstudy_datetime = models.DateTimeField(
         verbose_name="Off-study date and time",
         validators=[datetime_not_before_study_start, datetime_not_future],
@@ -59,23 +72,36 @@ class OffstudyModelMixin(UniqueSubjectIdentifierFieldMixin, models.Model):
     )
 
     def __str__(self):
-        dte_str = self.report_datetime.astimezone(ZoneInfo(settings.TIME_ZONE)).strftime(
-            convert_php_dateformat(settings.SHORT_DATETIME_FORMAT)
-        )
+        tzinfo, datetime_format = get_str_tzinfo_and_format()
+        dte_str = self.report_datetime.astimezone(tzinfo).strftime(datetime_format)
         return f"{self.subject_identifier} {dte_str}"
 
     def save(self, *args, **kwargs):
         self.report_datetime = self.offstudy_datetime
         datetime_not_before_study_start(self.offstudy_datetime)
         datetime_not_future(self.offstudy_datetime)
-        off_all_schedules_or_raise(subject_identifier=self.subject_identifier)
-        offstudy_datetime_after_all_offschedule_datetimes(
-            subject_identifier=self.subject_identifier,
-            offstudy_datetime=self.offstudy_datetime,
-            exception_cls=OffstudyError,
-        )
+        try:
+            subject_schedule_status = self.get_subject_schedule_status()
+            subject_schedule_status.off_all_schedules_or_raise()
+            subject_schedule_status.offstudy_datetime_after_all_offschedule_datetimes(
+                offstudy_datetime=self.offstudy_datetime,
+                exception_cls=OffstudyError,
+            )
+        finally:
+            self.subject_schedule_status = None
         super().save(*args, **kwargs)
 
+    def get_subject_schedule_status(self) -> SubjectScheduleStatus:
+        """Returns the SubjectScheduleStatus passed in from the form,
+        if for this subject, or a new one.
+        """
+        if (
+            self.subject_schedule_status
+            and self.subject_schedule_status.subject_identifier == self.subject_identifier
+        ):
+            return self.subject_schedule_status
+        return SubjectScheduleStatus(self.subject_identifier)
+
     def natural_key(self):
         return (self.subject_identifier,)
 
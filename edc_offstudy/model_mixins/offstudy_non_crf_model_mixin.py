@@ -4,7 +4,12 @@ from typing import Any
 
 from django.db import models
 
-from ..utils import raise_if_offstudy
+from ..instrumentation import instrument
+from ..utils import (
+    offstudy_db_triggers_enabled,
+    raise_if_offstudy,
+    translate_offstudy_trigger_error,
+)
 
 
 class OffstudyNonCrfModelError(Exception):
@@ -21,8 +26,14 @@ class OffstudyNonCrfModelMixin(models.Model):
     """
 
     def save(self: Any, *args, **kwargs):
-        self.raise_if_offstudy()
-        super().save(*args, **kwargs)
+        with instrument("save", self._meta.label_lower):
+            using = kwargs.get("using") or self._state.db
+            if offstudy_db_triggers_enabled(using, model_cls=self.__class__):
+                with translate_offstudy_trigger_error(using=using):
+                    super().save(*args, **kwargs)
+            else:
+                self.raise_if_offstudy()
+                super().save(*args, **kwargs)
 
     def raise_if_offstudy(self) -> None:
         raise_if_offstudy(
@@ -1,9 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime
+
 from django import forms
 from django.core.exceptions import ObjectDoesNotExist
 from edc_utils import formatted_datetime
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
-from ...utils import OffstudyError, raise_if_offstudy
+from ...instrumentation import instrument
+from ...offstudy_subjects import may_be_offstudy
+from ...utils import (
+    OffstudyError,
+    aget_offstudy_and_offschedule_datetimes,
+    get_offstudy_and_offschedule_datetimes,
+    raise_if_offstudy,
+    raise_if_report_datetime_after_offstudy,
+)
 
 
 class OffstudyCrfModelFormMixin:
@@ -14,10 +26,76 @@ class OffstudyCrfModelFormMixin:
 
     def clean(self):
         cleaned_data = super().clean()
-        self.raise_if_offstudy_by_report_datetime()
-        self.raise_if_offschedule_by_report_datetime()
+        with instrument("clean", self._meta.model._meta.label_lower):
+            self.raise_if_offstudy_or_offschedule_by_report_datetime()
         return cleaned_data
 
+    def raise_if_offstudy_or_offschedule_by_report_datetime(self):
+        """Raises a ValidationError if the subject is off study or
+        offschedule before the report_datetime.
+
+        Fetches the offstudy and offschedule datetimes in one query.
+        The off study error is raised first. If the subject is known
+        not to be off study, only checks offschedule.
+        """
+        if self.get_subject_identifier() and self.report_datetime:
+            if not may_be_offstudy(self.get_subject_identifier()):
+                self.raise_if_offschedule_by_report_datetime()
+                return
+            visit_schedule = site_visit_schedules.get_visit_schedule(self.visit_schedule_name)
+            schedule = visit_schedule.schedules.get(self.schedule_name)
+            offstudy_datetime, offschedule_datetime = get_offstudy_and_offschedule_datetimes(
+                subject_identifier=self.get_subject_identifier(),
+                report_datetime=self.report_datetime,
+                offschedule_model_cls=schedule.offschedule_model_cls,
+            )
+            self.raise_if_offstudy_or_offschedule(
+                f"{visit_schedule.name}.{schedule.name}",
+                offstudy_datetime,
+                offschedule_datetime,
+            )
+
+    async def araise_if_offstudy_or_offschedule_by_report_datetime(self):
+        """Async version of
+        `raise_if_offstudy_or_offschedule_by_report_datetime`.
+
+        For async views and endpoints that validate the off-study
+        and off-schedule dates outside of `clean`.
+        """
+        if self.get_subject_identifier() and self.report_datetime:
+            visit_schedule = site_visit_schedules.get_visit_schedule(self.visit_schedule_name)
+            schedule = visit_schedule.schedules.get(self.schedule_name)
+            offstudy_datetime, offschedule_datetime = (
+                await aget_offstudy_and_offschedule_datetimes(
+                    subject_identifier=self.get_subject_identifier(),
+                    report_datetime=self.report_datetime,
+                    offschedule_model_cls=schedule.offschedule_model_cls,
+                )
+            )
+            self.raise_if_offstudy_or_offschedule(
+                f"{visit_schedule.name}.{schedule.name}",
+                offstudy_datetime,
+                offschedule_datetime,
+            )
+
+    def raise_if_offstudy_or_offschedule(
+        self,
+        schedule_name: str,
+        offstudy_datetime: datetime | None,
+        offschedule_datetime: datetime | None,
+    ):
+        try:
+            raise_if_report_datetime_after_offstudy(
+                offstudy_datetime=offstudy_datetime,
+                source_obj=self.instance,
+                subject_identifier=self.get_subject_identifier(),
+                report_datetime=self.report_datetime,
+            )
+        except OffstudyError as e:
+            raise forms.ValidationError(e)
+        if offschedule_datetime:
+            self.raise_offschedule_error(schedule_name, offschedule_datetime)
+
     def raise_if_offschedule_by_report_datetime(self):
         """Raises a ValidationError if the subject is offschedule before
         the report_datetime.
@@ -33,14 +111,19 @@ class OffstudyCrfModelFormMixin:
             except ObjectDoesNotExist:
                 pass
             else:
-                offschedule_datetime = formatted_datetime(offschedule_obj.offschedule_datetime)
-                raise forms.ValidationError(
-                    f"Subject was taken off schedule before this report datetime. "
-                    f"Got subject_identifier='{self.get_subject_identifier()}', "
-                    f"schedule='{visit_schedule.name}.{schedule.name}, '"
-                    f"offschedule date='{offschedule_datetime}'."
+                self.raise_offschedule_error(
+                    f"{visit_schedule.name}.{schedule.name}",
+                    offschedule_obj.offschedule_datetime,
                 )
 
+    def raise_offschedule_error(self, schedule_name: str, offschedule_datetime: datetime):
+        raise forms.ValidationError(
+            f"Subject was taken off schedule before this report datetime. "
+            f"Got subject_identifier='{self.get_subject_identifier()}', "
+            f"schedule='{schedule_name}, '"
+            f"offschedule date='{formatted_datetime(offschedule_datetime)}'."
+        )
+
     def raise_if_offstudy_by_report_datetime(self):
         """Raises a ValidationError on a CRF if the subject is
         off study before the report_datetime.
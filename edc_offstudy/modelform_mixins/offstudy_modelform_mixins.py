@@ -1,9 +1,8 @@
 from django import forms
 from edc_visit_schedule.exceptions import OffScheduleError
-from edc_visit_schedule.utils import (
-    off_all_schedules_or_raise,
-    offstudy_datetime_after_all_offschedule_datetimes,
-)
+
+from ..instrumentation import instrument
+from ..subject_schedule_status import SubjectScheduleStatus
 
 
 class OffstudyModelFormMixin:
@@ -11,8 +10,12 @@ class OffstudyModelFormMixin:
 
     def clean(self):
         cleaned_data = super().clean()
-        self.off_all_schedules_or_raise()
-        self.offstudy_datetime_after_all_offschedule_datetimes()
+        with instrument("clean", self._meta.model._meta.label_lower):
+            self.subject_schedule_status = SubjectScheduleStatus(self.get_subject_identifier())
+            self.off_all_schedules_or_raise()
+            self.offstudy_datetime_after_all_offschedule_datetimes()
+        # reused by the model's save
+        self.instance.subject_schedule_status = self.subject_schedule_status
         return cleaned_data
 
     def off_all_schedules_or_raise(self):
@@ -20,7 +23,7 @@ class OffstudyModelFormMixin:
         but subject is still on one or more schedules.
         """
         try:
-            off_all_schedules_or_raise(subject_identifier=self.get_subject_identifier())
+            self.subject_schedule_status.off_all_schedules_or_raise()
         except OffScheduleError as e:
             raise forms.ValidationError(e)
 
@@ -28,8 +31,7 @@ class OffstudyModelFormMixin:
         """Raises a ValidationError if any offschedule datetime is after
         this offstudy_datetime.
         """
-        offstudy_datetime_after_all_offschedule_datetimes(
-            subject_identifier=self.get_subject_identifier(),
+        self.subject_schedule_status.offstudy_datetime_after_all_offschedule_datetimes(
             offstudy_datetime=self.cleaned_data.get("offstudy_datetime"),
             exception_cls=forms.ValidationError,
         )
@@ -1,7 +1,9 @@
 from django import forms
 
 from ...exceptions import OffstudyError
-from ...utils import raise_if_offstudy
+from ...instrumentation import instrument
+from ...offstudy_subjects import may_be_offstudy
+from ...utils import araise_if_offstudy, raise_if_offstudy
 
 
 class OffstudyNonCrfModelFormMixin:
@@ -9,11 +11,16 @@ class OffstudyNonCrfModelFormMixin:
 
     def clean(self):
         cleaned_data = super().clean()
-        self.raise_if_offstudy_by_report_datetime()
+        with instrument("clean", self._meta.model._meta.label_lower):
+            self.raise_if_offstudy_by_report_datetime()
         return cleaned_data
 
     def raise_if_offstudy_by_report_datetime(self) -> None:
-        if self.get_subject_identifier() and self.report_datetime:
+        if (
+            self.get_subject_identifier()
+            and self.report_datetime
+            and may_be_offstudy(self.get_subject_identifier())
+        ):
             try:
                 raise_if_offstudy(
                     source_obj=self.instance,
@@ -22,3 +29,19 @@ class OffstudyNonCrfModelFormMixin:
                 )
             except OffstudyError as e:
                 raise forms.ValidationError(e)
+
+    async def araise_if_offstudy_by_report_datetime(self) -> None:
+        """Async version of `raise_if_offstudy_by_report_datetime`.
+
+        For async views and endpoints that validate the off-study
+        date outside of `clean`.
+        """
+        if self.get_subject_identifier() and self.report_datetime:
+            try:
+                await araise_if_offstudy(
+                    source_obj=self.instance,
+                    subject_identifier=self.get_subject_identifier(),
+                    report_datetime=self.report_datetime,
+                )
+            except OffstudyError as e:
+                raise forms.ValidationError(e)
@@ -1,3 +1,4 @@
+from django.db import models
 from edc_action_item.models import ActionNoManagersModelMixin
 from edc_identifier.managers import SubjectIdentifierManager
 from edc_model.models import BaseUuidModel, HistoricalRecords
@@ -25,4 +26,56 @@ class SubjectOffstudy(
     class Meta(BaseUuidModel.Meta):
         verbose_name = "Subject Offstudy"
         verbose_name_plural = "Subject Offstudy"
-        indexes = ActionNoManagersModelMixin.Meta.indexes + BaseUuidModel.Meta.indexes
+        # see also migration 0027 for the covering subject_identifier
+        # index on PostgreSQL
+        indexes = (
+            ActionNoManagersModelMixin.Meta.indexes
+            + BaseUuidModel.Meta.indexes
+            + [models.Index(fields=["offstudy_datetime", "subject_identifier"])]
+        )
+
+
+class OffstudyStatus(models.Model):
+    """A compact, denormalized copy of the subject's offstudy_datetime
+    from the Offstudy model.
+
+    Kept in sync by the Offstudy model post_save/post_delete signals.
+    Used by `raise_if_offstudy` if settings.EDC_OFFSTUDY_USE_STATUS_MODEL
+    is True. Rebuild with management command `rebuild_offstudy_status`.
+    """
+
+    subject_identifier = models.CharField(max_length=50, primary_key=True)
+
+    offstudy_datetime = models.DateTimeField()
+
+    def __str__(self):
+        return self.subject_identifier
+
+    class Meta:
+        # see also migration 0028 for the covering index on PostgreSQL
+        verbose_name = "Off-study status"
+        verbose_name_plural = "Off-study status"
+
+
+class OffstudyVersion(models.Model):
+    """A single row counting changes to the Offstudy model.
+
+    Incremented by the Offstudy model post_save/post_delete signals.
+    Read by `OffstudySubjects` to detect changes made by other
+    processes.
+
+    `status_populated` is set by `rebuild_offstudy_status` and unset
+    if the Offstudy model changes while OffstudyStatus is not kept
+    in sync.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    status_populated = models.BooleanField(default=False)
+
+    def __str__(self):
+        return str(self.version)
+
+    class Meta:
+        verbose_name = "Off-study version"
+        verbose_name_plural = "Off-study version"
@@ -1,3 +1,6 @@
 from django_collect_offline.site_offline_models import site_offline_models
 
-site_offline_models.register_for_app("edc_offstudy")
+site_offline_models.register_for_app(
+    "edc_offstudy",
+    exclude_models=["edc_offstudy.offstudystatus", "edc_offstudy.offstudyversion"],
+)
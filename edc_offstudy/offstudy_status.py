@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from edc_visit_schedule.site_visit_schedules import SiteVisitScheduleError
+
+from .utils import OFFSTUDY_VERSION_PK, get_offstudy_model, get_offstudy_model_cls
+
+if TYPE_CHECKING:
+    from .model_mixins import OffstudyModelMixin
+    from .models import OffstudyStatus
+
+
+def get_offstudy_status_model_cls() -> OffstudyStatus:
+    return django_apps.get_model("edc_offstudy.offstudystatus")
+
+
+def is_offstudy_model(instance: OffstudyModelMixin) -> bool:
+    """Returns True if instance is of the Offstudy model
+    referenced by the visit schedules.
+    """
+    try:
+        offstudy_model = get_offstudy_model()
+    except SiteVisitScheduleError:
+        return False
+    return instance._meta.label_lower == offstudy_model
+
+
+def offstudy_status_enabled() -> bool:
+    return getattr(settings, "EDC_OFFSTUDY_USE_STATUS_MODEL", False)
+
+
+def set_offstudy_status_populated() -> None:
+    model_cls = django_apps.get_model("edc_offstudy.offstudyversion")
+    if not model_cls.objects.filter(pk=OFFSTUDY_VERSION_PK).update(status_populated=True):
+        model_cls.objects.get_or_create(
+            pk=OFFSTUDY_VERSION_PK, defaults={"status_populated": True}
+        )
+
+
+def unset_offstudy_status_populated() -> None:
+    django_apps.get_model("edc_offstudy.offstudyversion").objects.filter(
+        pk=OFFSTUDY_VERSION_PK, status_populated=True
+    ).update(status_populated=False)
+
+
+def update_offstudy_status(instance: OffstudyModelMixin) -> None:
+    """Updates the subject's OffstudyStatus.
+
+    Skipped unless settings.EDC_OFFSTUDY_USE_STATUS_MODEL is True.
+    If skipped, OffstudyStatus is flagged as not populated, so
+    lookups read the Offstudy model until `rebuild_offstudy_status`
+    is run.
+    """
+    if is_offstudy_model(instance):
+        if offstudy_status_enabled():
+            get_offstudy_status_model_cls().objects.update_or_create(
+                subject_identifier=instance.subject_identifier,
+                defaults={"offstudy_datetime": instance.offstudy_datetime},
+            )
+        else:
+            unset_offstudy_status_populated()
+
+
+def delete_offstudy_status(instance: OffstudyModelMixin) -> None:
+    if is_offstudy_model(instance):
+        if offstudy_status_enabled():
+            get_offstudy_status_model_cls().objects.filter(
+                subject_identifier=instance.subject_identifier
+            ).delete()
+        else:
+            unset_offstudy_status_populated()
+
+
+def rebuild_offstudy_status(batch_size: int | None = None) -> int:
+    """Rebuilds the OffstudyStatus model from the Offstudy model
+    and flags it as populated.
+
+    Returns the number of subjects off study.
+    """
+    batch_size = batch_size or 1000
+    model_cls = get_offstudy_status_model_cls()
+    queryset = get_offstudy_model_cls().objects.values_list(
+        "subject_identifier", "offstudy_datetime"
+    )
+    count = 0
+    with transaction.atomic():
+        model_cls.objects.all().delete()
+        batch = []
+        for subject_identifier, offstudy_datetime in queryset.iterator(chunk_size=batch_size):
+            batch.append(
+                model_cls(
+                    subject_identifier=subject_identifier,
+                    offstudy_datetime=offstudy_datetime,
+                )
+            )
+            if len(batch) == batch_size:
+                model_cls.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        model_cls.objects.bulk_create(batch)
+        count += len(batch)
+        set_offstudy_status_populated()
+    return count
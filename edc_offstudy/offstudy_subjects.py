@@ -0,0 +1,155 @@
+"""A process-local set of the subjects off study.
+
+Lets the off-study modelform mixins replace the off-study query for
+a subject not in the set, the common case, with a primary key
+select. Opt in with settings.EDC_OFFSTUDY_USE_SUBJECTS_SET=True.
+
+The set is built on first use and updated by the Offstudy model
+signals in this process. Each committed change also increments the
+version in the OffstudyVersion model. Once the version was read more
+than settings.EDC_OFFSTUDY_SUBJECTS_TTL seconds ago (default 5), the
+next check reads it again and rebuilds the set if another process
+changed the Offstudy model.
+
+A change in another process may go unseen by a form for up to the
+TTL. The model mixins always query, so a report dated after the
+subject's off-study datetime is still rejected on save.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .offstudy_status import is_offstudy_model
+from .utils import OFFSTUDY_VERSION_PK, get_offstudy_lookup_model_cls
+
+if TYPE_CHECKING:
+    from .model_mixins import OffstudyModelMixin
+
+OFFSTUDY_SUBJECTS_TTL = 5
+
+
+def get_offstudy_version_model_cls():
+    return django_apps.get_model("edc_offstudy.offstudyversion")
+
+
+def get_offstudy_version() -> int:
+    return (
+        get_offstudy_version_model_cls()
+        .objects.filter(pk=OFFSTUDY_VERSION_PK)
+        .values_list("version", flat=True)
+        .first()
+    ) or 0
+
+
+def increment_offstudy_version() -> None:
+    model_cls = get_offstudy_version_model_cls()
+    if not model_cls.objects.filter(pk=OFFSTUDY_VERSION_PK).update(version=F("version") + 1):
+        model_cls.objects.get_or_create(pk=OFFSTUDY_VERSION_PK, defaults={"version": 1})
+
+
+class OffstudySubjects:
+    """The set of subject identifiers off study as of `version`."""
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self.subject_identifiers: set[str] | None = None
+        self.version: int | None = None
+        self.checked_at: float | None = None
+        self.lock = threading.Lock()
+
+    def get_ttl(self) -> float:
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, "EDC_OFFSTUDY_SUBJECTS_TTL", OFFSTUDY_SUBJECTS_TTL)
+
+    def __contains__(self, subject_identifier: str) -> bool:
+        return subject_identifier in self.refresh()
+
+    def refresh(self) -> set[str]:
+        """Reads the version, if not read in the last TTL seconds, and
+        rebuilds the set if never built or if the version changed.
+        Returns the set.
+        """
+        subject_identifiers = self.subject_identifiers
+        if (
+            subject_identifiers is not None
+            and self.checked_at is not None
+            and time.monotonic() - self.checked_at < self.get_ttl()
+        ):
+            return subject_identifiers
+        version = get_offstudy_version()
+        with self.lock:
+            if self.subject_identifiers is None or version != self.version:
+                self.subject_identifiers = set(
+                    get_offstudy_lookup_model_cls().objects.values_list(
+                        "subject_identifier", flat=True
+                    )
+                )
+                self.version = version
+            self.checked_at = time.monotonic()
+            return self.subject_identifiers
+
+    def add(self, subject_identifier: str) -> None:
+        if self.subject_identifiers is not None:
+            self.subject_identifiers.add(subject_identifier)
+
+    def discard(self, subject_identifier: str) -> None:
+        if self.subject_identifiers is not None:
+            self.subject_identifiers.discard(subject_identifier)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.subject_identifiers = None
+            self.version = None
+            self.checked_at = None
+
+
+offstudy_subjects = OffstudySubjects()
+
+
+def offstudy_subjects_enabled() -> bool:
+    return getattr(settings, "EDC_OFFSTUDY_USE_SUBJECTS_SET", False)
+
+
+def may_be_offstudy(subject_identifier: str) -> bool:
+    """Returns False if the subject is known not to be off study,
+    otherwise True.
+
+    Always True unless settings.EDC_OFFSTUDY_USE_SUBJECTS_SET is True.
+    """
+    if not offstudy_subjects_enabled():
+        return True
+    return subject_identifier in offstudy_subjects
+
+
+def update_offstudy_subjects(
+    instance: OffstudyModelMixin, deleted: bool | None = None, using: str | None = None
+) -> None:
+    """Once committed, increments the version and updates the set
+    in this process.
+
+    The version is incremented after commit, not in the transaction
+    that saves the Offstudy model, so concurrent saves do not wait
+    on the row lock of the version row.
+
+    Called by the Offstudy model post_save/post_delete signals.
+    """
+    if offstudy_subjects_enabled() and is_offstudy_model(instance):
+        subject_identifier = instance.subject_identifier
+
+        def on_commit():
+            increment_offstudy_version()
+            if deleted:
+                offstudy_subjects.discard(subject_identifier)
+            else:
+                offstudy_subjects.add(subject_identifier)
+
+        transaction.on_commit(on_commit, using=using)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from functools import cached_property
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def get_estimated_count(queryset: QuerySet) -> int | None:
+    """Returns the planner's row estimate for the queryset's table or
+    None.
+
+    Only for an unfiltered queryset on PostgreSQL. The estimate comes
+    from `pg_class.reltuples`, updated by VACUUM and ANALYZE, and
+    is -1 if the table was never analyzed.
+    """
+    if not isinstance(queryset, QuerySet) or queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses the table's row estimate instead of
+    `count()` for an unfiltered queryset with more than
+    `estimated_count_threshold` rows.
+
+    For admin changelists on large tables. Filtered querysets, small
+    tables and backends other than PostgreSQL are counted as usual.
+    """
+
+    estimated_count_threshold = ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self) -> int:
+        estimated_count = get_estimated_count(self.object_list)
+        if estimated_count is not None and estimated_count > self.estimated_count_threshold:
+            return estimated_count
+        return super().count
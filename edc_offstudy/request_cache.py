@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Iterator
+
+
+class OffstudyCache:
+    """A cache of offstudy_datetime by subject_identifier.
+
+    A value of None means the subject is not off study. `hits`
+    counts values returned by `get`.
+    """
+
+    def __init__(self):
+        self.offstudy_datetimes: dict[str, datetime | None] = {}
+        self.hits = 0
+
+    def __contains__(self, subject_identifier: str) -> bool:
+        return subject_identifier in self.offstudy_datetimes
+
+    def get(self, subject_identifier: str) -> datetime | None:
+        self.hits += 1
+        return self.offstudy_datetimes.get(subject_identifier)
+
+    def set(self, subject_identifier: str, offstudy_datetime: datetime | None) -> None:
+        self.offstudy_datetimes[subject_identifier] = offstudy_datetime
+
+    def invalidate(self, subject_identifier: str | None = None) -> None:
+        if subject_identifier is None:
+            self.offstudy_datetimes.clear()
+        else:
+            self.offstudy_datetimes.pop(subject_identifier, None)
+
+
+_current_cache: ContextVar[OffstudyCache | None] = ContextVar(
+    "edc_offstudy_cache", default=None
+)
+
+# caches active in any thread or task, for invalidation by signals
+_active_caches: weakref.WeakSet[OffstudyCache] = weakref.WeakSet()
+
+
+@contextmanager
+def offstudy_cache() -> Iterator[OffstudyCache]:
+    """Context manager to cache off-study lookups by subject for the
+    duration of the block.
+
+    Nested blocks share the outermost cache. See also
+    `OffstudyCacheMiddleware`.
+    """
+    cache = _current_cache.get()
+    if cache is not None:
+        yield cache
+    else:
+        cache = OffstudyCache()
+        _active_caches.add(cache)
+        token = _current_cache.set(cache)
+        try:
+            yield cache
+        finally:
+            _current_cache.reset(token)
+            _active_caches.discard(cache)
+
+
+def get_offstudy_cache() -> OffstudyCache | None:
+    """Returns the active cache or None."""
+    return _current_cache.get()
+
+
+def invalidate_offstudy_cache(subject_identifier: str | None = None) -> None:
+    """Removes the subject from all active caches or, if
+    subject_identifier is None, clears all active caches.
+    """
+    for cache in list(_active_caches):
+        cache.invalidate(subject_identifier)
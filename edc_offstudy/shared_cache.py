@@ -0,0 +1,119 @@
+"""Off-study lookups cached in a Django cache shared by processes,
+e.g. memcached or redis.
+
+Opt in by naming the cache alias:
+
+    CACHES = {..., "offstudy": {...}}
+    EDC_OFFSTUDY_SHARED_CACHE = "offstudy"
+    EDC_OFFSTUDY_SHARED_CACHE_TTL = 300
+
+Subjects not off study are cached as well (negative caching). Keys
+are namespaced by the Offstudy model, see `get_offstudy_model`.
+
+Lookups fill the cache with `add` so they never overwrite a value
+written through by the Offstudy model signals, which `set` the new
+value once the transaction commits. Until then, lookups on the same
+database connection do not fill the cache for the subject, so an
+uncommitted value is never shared.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .offstudy_status import is_offstudy_model
+from .utils import get_offstudy_model, get_uncommitted_subject_identifiers
+
+if TYPE_CHECKING:
+    from django.core.cache.backends.base import BaseCache
+
+    from .model_mixins import OffstudyModelMixin
+
+SHARED_CACHE_TTL = 300
+# cached value for a subject not off study
+NOT_OFFSTUDY = "not_offstudy"
+
+
+class SharedOffstudyCache:
+    def __init__(self, cache: BaseCache, timeout: int | None = None):
+        self.cache = cache
+        self.timeout = timeout
+
+    @staticmethod
+    def get_key(subject_identifier: str) -> str:
+        return f"edc_offstudy:{get_offstudy_model()}:{subject_identifier}"
+
+    @staticmethod
+    def to_value(offstudy_datetime: datetime | None) -> datetime | str:
+        return NOT_OFFSTUDY if offstudy_datetime is None else offstudy_datetime
+
+    @staticmethod
+    def from_value(value: datetime | str | None) -> tuple[bool, datetime | None]:
+        if value is None:
+            return False, None
+        return True, (None if value == NOT_OFFSTUDY else value)
+
+    def get(self, subject_identifier: str) -> tuple[bool, datetime | None]:
+        """Returns a tuple of (found, offstudy_datetime)."""
+        return self.from_value(self.cache.get(self.get_key(subject_identifier)))
+
+    async def aget(self, subject_identifier: str) -> tuple[bool, datetime | None]:
+        return self.from_value(await self.cache.aget(self.get_key(subject_identifier)))
+
+    def add(self, subject_identifier: str, offstudy_datetime: datetime | None) -> None:
+        if subject_identifier in get_uncommitted_subject_identifiers():
+            return
+        self.cache.add(
+            self.get_key(subject_identifier), self.to_value(offstudy_datetime), self.timeout
+        )
+
+    async def aadd(self, subject_identifier: str, offstudy_datetime: datetime | None) -> None:
+        if subject_identifier in get_uncommitted_subject_identifiers():
+            return
+        await self.cache.aadd(
+            self.get_key(subject_identifier), self.to_value(offstudy_datetime), self.timeout
+        )
+
+    def set(self, subject_identifier: str, offstudy_datetime: datetime | None) -> None:
+        self.cache.set(
+            self.get_key(subject_identifier), self.to_value(offstudy_datetime), self.timeout
+        )
+
+    def delete(self, subject_identifier: str) -> None:
+        self.cache.delete(self.get_key(subject_identifier))
+
+
+def get_shared_offstudy_cache() -> SharedOffstudyCache | None:
+    """Returns the shared off-study cache or None if
+    settings.EDC_OFFSTUDY_SHARED_CACHE is not set.
+    """
+    alias = getattr(settings, "EDC_OFFSTUDY_SHARED_CACHE", None)
+    if not alias:
+        return None
+    return SharedOffstudyCache(
+        caches[alias],
+        timeout=getattr(settings, "EDC_OFFSTUDY_SHARED_CACHE_TTL", SHARED_CACHE_TTL),
+    )
+
+
+def write_through_shared_offstudy_cache(
+    instance: OffstudyModelMixin, deleted: bool | None = None, using: str | None = None
+) -> None:
+    """Removes the subject from the shared cache now and writes the
+    new value once the transaction commits.
+
+    Called by the Offstudy model post_save/post_delete signals.
+    """
+    shared_cache = get_shared_offstudy_cache()
+    if shared_cache and is_offstudy_model(instance):
+        subject_identifier = instance.subject_identifier
+        offstudy_datetime = None if deleted else instance.offstudy_datetime
+        shared_cache.delete(subject_identifier)
+        transaction.on_commit(
+            lambda: shared_cache.set(subject_identifier, offstudy_datetime), using=using
+        )
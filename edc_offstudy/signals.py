@@ -0,0 +1,57 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import get_offstudy_event_dispatcher, send_offstudy_event_on_commit
+from .instrumentation import get_instrumentation_sink
+from .model_mixins import OffstudyModelMixin
+from .model_mixins.offstudy_model_mixin import get_str_tzinfo_and_format
+from .offstudy_status import delete_offstudy_status, update_offstudy_status
+from .offstudy_subjects import offstudy_subjects, update_offstudy_subjects
+from .request_cache import invalidate_offstudy_cache
+from .shared_cache import write_through_shared_offstudy_cache
+from .utils import (
+    clear_offstudy_status_populated,
+    get_installed_offstudy_triggers,
+    set_offstudy_change_uncommitted,
+)
+
+
+@receiver(post_save, weak=False, dispatch_uid="offstudy_model_on_post_save")
+def offstudy_model_on_post_save(sender, instance, raw, created, using, **kwargs):
+    if isinstance(instance, (OffstudyModelMixin,)):
+        set_offstudy_change_uncommitted(instance.subject_identifier, using=using)
+        invalidate_offstudy_cache(instance.subject_identifier)
+        update_offstudy_status(instance)
+        update_offstudy_subjects(instance, using=using)
+        write_through_shared_offstudy_cache(instance, using=using)
+        if not raw:
+            send_offstudy_event_on_commit(instance, created, using=using)
+
+
+@receiver(post_delete, weak=False, dispatch_uid="offstudy_model_on_post_delete")
+def offstudy_model_on_post_delete(instance, using, **kwargs):
+    if isinstance(instance, (OffstudyModelMixin,)):
+        set_offstudy_change_uncommitted(instance.subject_identifier, using=using)
+        invalidate_offstudy_cache(instance.subject_identifier)
+        delete_offstudy_status(instance)
+        update_offstudy_subjects(instance, deleted=True, using=using)
+        write_through_shared_offstudy_cache(instance, deleted=True, using=using)
+
+
+@receiver(setting_changed, weak=False, dispatch_uid="offstudy_on_setting_changed")
+def offstudy_on_setting_changed(setting, **kwargs):
+    if setting in ["TIME_ZONE", "SHORT_DATETIME_FORMAT"]:
+        get_str_tzinfo_and_format.cache_clear()
+    elif setting in ["EDC_OFFSTUDY_EVENT_DISPATCHER", "EDC_OFFSTUDY_EVENT_DISPATCHER_OPTIONS"]:
+        get_offstudy_event_dispatcher.cache_clear()
+    elif setting in [
+        "EDC_OFFSTUDY_INSTRUMENTATION_SINK",
+        "EDC_OFFSTUDY_INSTRUMENTATION_SINK_OPTIONS",
+    ]:
+        get_instrumentation_sink.cache_clear()
+    elif setting in ["EDC_OFFSTUDY_USE_SUBJECTS_SET", "EDC_OFFSTUDY_USE_STATUS_MODEL"]:
+        offstudy_subjects.clear()
+        clear_offstudy_status_populated()
+    elif setting == "EDC_OFFSTUDY_DB_TRIGGERS":
+        get_installed_offstudy_triggers.cache_clear()
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from django import forms
+from django.apps import apps as django_apps
+from edc_utils import formatted_datetime
+from edc_visit_schedule.exceptions import OffScheduleError
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+if TYPE_CHECKING:
+    from edc_visit_schedule.schedule import Schedule
+    from edc_visit_schedule.visit_schedule import VisitSchedule
+
+
+def values_list_for_subjects(
+    model: str, subject_identifiers: list[str], chunk_size: int, *fields: str
+) -> Iterator:
+    """Yields `subject_identifier`, or a tuple of `subject_identifier`
+    and `fields`, for the model's rows for the subjects with one `IN`
+    query per chunk.
+    """
+    for index in range(0, len(subject_identifiers), chunk_size):
+        qs = django_apps.get_model(model).objects.filter(
+            subject_identifier__in=subject_identifiers[index : index + chunk_size]
+        )
+        if fields:
+            yield from qs.values_list("subject_identifier", *fields)
+        else:
+            yield from qs.values_list("subject_identifier", flat=True)
+
+
+class SubjectScheduleStatus:
+    """On and off schedule status of a subject across all
+    registered visit schedules.
+
+    Loads the subject's onschedule and offschedule rows with one
+    query per model instead of one query per schedule per check.
+    Used by `OffstudyModelMixin.save` and `OffstudyModelFormMixin`
+    in place of `off_all_schedules_or_raise` and
+    `offstudy_datetime_after_all_offschedule_datetimes`.
+    """
+
+    def __init__(self, subject_identifier: str):
+        self.subject_identifier = subject_identifier
+
+    @classmethod
+    def for_subjects(
+        cls, subject_identifiers: Iterable[str], chunk_size: int | None = None
+    ) -> dict[str, SubjectScheduleStatus]:
+        """Returns a dictionary of {subject_identifier: SubjectScheduleStatus}
+        loaded with `IN` queries per onschedule and offschedule model
+        in chunks of `chunk_size`, instead of queries per subject.
+        """
+        subject_identifiers = list(dict.fromkeys(subject_identifiers))
+        chunk_size = chunk_size or 500
+        statuses = {}
+        for subject_identifier in subject_identifiers:
+            statuses[subject_identifier] = cls(subject_identifier)
+            statuses[subject_identifier].onschedule_models = []
+            statuses[subject_identifier].onschedule_site_ids = {}
+            statuses[subject_identifier].offschedule_datetimes = {}
+        if not statuses:
+            return statuses
+        schedules = next(iter(statuses.values())).schedules
+        for status in statuses.values():
+            status.schedules = schedules
+        for model in {schedule.onschedule_model for _, schedule in schedules}:
+            for subject_identifier, site_id in values_list_for_subjects(
+                model, subject_identifiers, chunk_size, "site_id"
+            ):
+                if model not in statuses[subject_identifier].onschedule_site_ids:
+                    statuses[subject_identifier].onschedule_models.append(model)
+                    statuses[subject_identifier].onschedule_site_ids.update({model: site_id})
+        for model in {schedule.offschedule_model for _, schedule in schedules}:
+            onschedule_models = {
+                schedule.onschedule_model
+                for _, schedule in schedules
+                if schedule.offschedule_model == model
+            }
+            for subject_identifier, offschedule_datetime in values_list_for_subjects(
+                model, subject_identifiers, chunk_size, "offschedule_datetime"
+            ):
+                if offschedule_datetime and onschedule_models.intersection(
+                    statuses[subject_identifier].onschedule_models
+                ):
+                    statuses[subject_identifier].offschedule_datetimes.update(
+                        {model: offschedule_datetime}
+                    )
+        return statuses
+
+    @cached_property
+    def schedules(self) -> list[tuple[VisitSchedule, Schedule]]:
+        return [
+            (visit_schedule, schedule)
+            for visit_schedule in site_visit_schedules.get_visit_schedules().values()
+            for schedule in visit_schedule.schedules.values()
+        ]
+
+    @cached_property
+    def onschedule_models(self) -> list[str]:
+        """Returns onschedule models, label_lower, with a row for
+        this subject.
+        """
+        return [
+            model
+            for model in {schedule.onschedule_model for _, schedule in self.schedules}
+            if django_apps.get_model(model)
+            .objects.filter(subject_identifier=self.subject_identifier)
+            .exists()
+        ]
+
+    @cached_property
+    def onschedule_site_ids(self) -> dict[str, int]:
+        """Returns a dictionary of {onschedule model: site_id} for
+        the schedules this subject was put on.
+        """
+        return {
+            model: django_apps.get_model(model)
+            .objects.filter(subject_identifier=self.subject_identifier)
+            .values_list("site_id", flat=True)
+            .first()
+            for model in self.onschedule_models
+        }
+
+    @property
+    def site_id(self) -> int | None:
+        """Returns the site_id of the subject's onschedule model
+        instances or None if not on any schedule.
+        """
+        return next(iter(self.onschedule_site_ids.values()), None)
+
+    @cached_property
+    def offschedule_datetimes(self) -> dict[str, datetime]:
+        """Returns a dictionary of {offschedule model: offschedule_datetime}
+        for the schedules this subject was put on.
+        """
+        offschedule_datetimes = {}
+        for model in {
+            schedule.offschedule_model
+            for _, schedule in self.schedules
+            if schedule.onschedule_model in self.onschedule_models
+        }:
+            offschedule_datetime = (
+                django_apps.get_model(model)
+                .objects.filter(subject_identifier=self.subject_identifier)
+                .values_list("offschedule_datetime", flat=True)
+                .first()
+            )
+            if offschedule_datetime:
+                offschedule_datetimes.update({model: offschedule_datetime})
+        return offschedule_datetimes
+
+    def off_all_schedules_or_raise(self, exception_cls=None) -> None:
+        """Raises an exception if subject is still on any schedule."""
+        exception_cls = exception_cls or OffScheduleError
+        for visit_schedule, schedule in self.schedules:
+            if (
+                schedule.onschedule_model in self.onschedule_models
+                and schedule.offschedule_model not in self.offschedule_datetimes
+            ):
+                model_name = schedule.offschedule_model_cls()._meta.verbose_name.title()
+                raise exception_cls(
+                    f"Subject cannot be taken off study. Subject is still on a "
+                    f"schedule. Got schedule '{visit_schedule.name}.{schedule.name}. "
+                    f"Complete the offschedule form `{model_name}` first. "
+                    f"Subject identifier='{self.subject_identifier}', "
+                )
+
+    def take_off_all_schedules(self, offschedule_datetime: datetime) -> list[str]:
+        """Takes the subject off each schedule not yet closed and
+        returns the schedule names, `visit_schedule.schedule`.
+
+        Creates the offschedule model instance with the site of the
+        onschedule model instance, setting the datetime field named
+        by `offschedule_datetime_field_attr`. Its post_save signal in
+        edc_visit_schedule updates the schedule history and removes
+        future appointments, see `SubjectSchedule.take_off_schedule`.
+        """
+        names = []
+        for visit_schedule, schedule in self.schedules:
+            if (
+                schedule.onschedule_model in self.onschedule_models
+                and schedule.offschedule_model not in self.offschedule_datetimes
+            ):
+                model_cls = schedule.offschedule_model_cls
+                datetime_field_attr = getattr(model_cls, "offschedule_datetime_field_attr")
+                model_cls.objects.create(
+                    subject_identifier=self.subject_identifier,
+                    site_id=self.onschedule_site_ids.get(schedule.onschedule_model),
+                    **{datetime_field_attr: offschedule_datetime},
+                )
+                self.offschedule_datetimes.update(
+                    {schedule.offschedule_model: offschedule_datetime}
+                )
+                names.append(f"{visit_schedule.name}.{schedule.name}")
+        return names
+
+    def offstudy_datetime_after_all_offschedule_datetimes(
+        self, offstudy_datetime: datetime, exception_cls=None
+    ) -> None:
+        """Raises an exception if any offschedule datetime is after
+        the offstudy_datetime.
+        """
+        exception_cls = exception_cls or forms.ValidationError
+        if not offstudy_datetime:
+            return
+        for visit_schedule, schedule in self.schedules:
+            offschedule_datetime = self.offschedule_datetimes.get(schedule.offschedule_model)
+            if (
+                schedule.onschedule_model in self.onschedule_models
+                and offschedule_datetime
+                and offschedule_datetime > offstudy_datetime
+            ):
+                raise exception_cls(
+                    "`Offstudy` datetime cannot be before any `offschedule` datetime. "
+                    f"Got {self.subject_identifier} went off schedule "
+                    f"`{visit_schedule.name}.{schedule.name}` on "
+                    f"{formatted_datetime(offschedule_datetime)}."
+                )
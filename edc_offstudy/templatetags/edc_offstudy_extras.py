@@ -7,16 +7,34 @@ from django.core.exceptions import ObjectDoesNotExist
 register = template.Library()
 
 
-@register.inclusion_tag("edc_offstudy/visit_schedule_row.html")
-def offstudy_visit_schedule_row(subject_identifier, visit_schedule, subject_dashboard_url):
+@register.inclusion_tag("edc_offstudy/visit_schedule_row.html", takes_context=True)
+def offstudy_visit_schedule_row(
+    context, subject_identifier, visit_schedule, subject_dashboard_url, offstudy_objs=None
+):
+    """Renders the off-study footer for a visit schedule row.
+
+    `offstudy_objs` is an optional mapping of
+    {subject_identifier: offstudy model instance}, see
+    `edc_offstudy.utils.get_offstudy_objs`. If not passed, the
+    mapping is taken from `offstudy_objs` in the context, if
+    present. With a mapping, no query is done; subjects not in
+    the mapping are treated as not off study.
+    """
+    obj = None
+    if offstudy_objs is None:
+        offstudy_objs = context.get("offstudy_objs")
+    if offstudy_objs is not None:
+        obj = offstudy_objs.get(subject_identifier)
+        if obj and obj._meta.label_lower != visit_schedule.offstudy_model:
+            offstudy_objs = None
+    if offstudy_objs is None:
+        offstudy_model_cls = django_apps.get_model(visit_schedule.offstudy_model)
+        try:
+            obj = offstudy_model_cls.objects.get(subject_identifier=subject_identifier)
+        except ObjectDoesNotExist:
+            obj = None
     context = {}
-    offstudy_model = visit_schedule.offstudy_model
-    offstudy_model_cls = django_apps.get_model(offstudy_model)
-    try:
-        obj = offstudy_model_cls.objects.get(subject_identifier=subject_identifier)
-    except ObjectDoesNotExist:
-        pass
-    else:
+    if obj:
         options = dict(subject_identifier=subject_identifier)
         query = unquote(urlencode(options))
         href = f"{obj.get_absolute_url()}?next={subject_dashboard_url},subject_identifier"
@@ -0,0 +1,46 @@
+import sys
+from unittest import skipUnless
+
+from django.test import TestCase
+
+from edc_offstudy.closeout import close_out_subjects
+from edc_offstudy.models import SubjectOffstudy
+
+from ..helper import OffstudyTestCaseMixin
+from .utils import BENCHMARK_ENABLED, run_benchmark
+
+
+@skipUnless(BENCHMARK_ENABLED, "Set EDC_OFFSTUDY_BENCHMARK=1 to run benchmarks")
+class TestCloseoutBenchmark(OffstudyTestCaseMixin, TestCase):
+    """Measures `close_out_subjects` with `off_schedule=True` per
+    batch of `batch_size` subjects still on schedule.
+
+    Run with:
+        EDC_OFFSTUDY_BENCHMARK=1 python runtests.py
+    """
+
+    subject_count = 200
+    batch_size = 50
+    subject_identifiers = [f"3{index:08d}" for index in range(subject_count)]
+
+    def test_closeout(self):
+        def close_out(index):
+            close_out_subjects(
+                self.subject_identifiers[
+                    index * self.batch_size : (index + 1) * self.batch_size
+                ],
+                offstudy_datetime=self.offstudy_datetime,
+                off_schedule=True,
+            )
+
+        result = run_benchmark(
+            f"close_out_subjects (batch of {self.batch_size})",
+            close_out,
+            size=self.subject_count,
+            operations=self.subject_count // self.batch_size,
+        )
+        sys.stdout.write(
+            f"\nclose-out per subject: {result.p50 / self.batch_size * 1000:.3f}ms, "
+            f"{result.queries_per_operation / self.batch_size:.1f} queries"
+        )
+        self.assertEqual(SubjectOffstudy.objects.count(), self.subject_count)
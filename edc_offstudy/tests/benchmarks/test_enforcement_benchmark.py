@@ -0,0 +1,149 @@
+import sys
+from unittest import skipUnless
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase
+from edc_appointment.models import Appointment
+from edc_constants.constants import DEAD
+from edc_visit_tracking.constants import SCHEDULED
+from edc_visit_tracking.models import SubjectVisit
+
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.utils import raise_if_offstudy
+
+from ..forms import CrfOneForm, NonCrfOneForm, SubjectOffstudyForm
+from ..helper import OffstudyTestCaseMixin
+from ..models import CrfOne, NonCrfOne, OffScheduleOne
+from .utils import (
+    BENCHMARK_ENABLED,
+    BenchmarkResult,
+    bulk_create_offstudy,
+    get_benchmark_sizes,
+    run_benchmark,
+)
+
+
+@skipUnless(BENCHMARK_ENABLED, "Set EDC_OFFSTUDY_BENCHMARK=1 to run benchmarks")
+class TestEnforcementBenchmark(OffstudyTestCaseMixin, TestCase):
+    """Measures the cost of off-study enforcement per CRF save,
+    per form clean and per off-study submission with `size`
+    subjects already off study.
+
+    The off-study rows for `size` subjects are bulk created as
+    background volume. The measured operations are for a few
+    consented subjects created in setUp.
+
+    Run with:
+        EDC_OFFSTUDY_BENCHMARK=1 python runtests.py
+
+    Set EDC_OFFSTUDY_BENCHMARK_SIZES to change the sizes and
+    EDC_OFFSTUDY_DATABASE=postgresql to run on a local PostgreSQL
+    (see test_settings).
+    """
+
+    offstudy_subject_count = 20
+
+    def setUp(self):
+        super().setUp()
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("appt_datetime")[0]
+        self.subject_visit = SubjectVisit.objects.create(
+            appointment=appointment,
+            visit_schedule_name=appointment.visit_schedule_name,
+            schedule_name=appointment.schedule_name,
+            visit_code=appointment.visit_code,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        # subjects off schedule but not yet off study
+        self.offschedule_subject_identifiers = []
+        for index in range(0, self.offstudy_subject_count):
+            subject_identifier = f"2{index:08d}"
+            self.helper.consent_and_put_on_schedule(subject_identifier)
+            OffScheduleOne.objects.create(
+                subject_identifier=subject_identifier,
+                report_datetime=self.offstudy_datetime,
+                offschedule_datetime=self.offstudy_datetime,
+            )
+            self.offschedule_subject_identifiers.append(subject_identifier)
+
+    def benchmark_size(self, size: int) -> list[BenchmarkResult]:
+        subject_identifiers = bulk_create_offstudy(
+            size, self.helper.consent_datetime + relativedelta(days=1)
+        )
+        report_datetime = self.helper.consent_datetime
+        site_id = settings.SITE_ID
+        results = []
+
+        def check(index):
+            raise_if_offstudy(
+                subject_identifier=subject_identifiers[(index * 7919) % size],
+                report_datetime=report_datetime,
+            )
+
+        def save_crf(index):
+            CrfOne(subject_visit=self.subject_visit, report_datetime=report_datetime).save()
+
+        def save_non_crf(index):
+            NonCrfOne(
+                subject_identifier=self.subject_identifier, report_datetime=report_datetime
+            ).save()
+
+        def clean_crf_form(index):
+            CrfOneForm(
+                data=dict(
+                    subject_visit=self.subject_visit,
+                    report_datetime=report_datetime,
+                    visit_schedule_name=self.subject_visit.visit_schedule_name,
+                    schedule_name=self.subject_visit.schedule_name,
+                    site=site_id,
+                )
+            ).is_valid()
+
+        def clean_non_crf_form(index):
+            NonCrfOneForm(
+                data=dict(
+                    subject_identifier=self.subject_identifier,
+                    report_datetime=report_datetime,
+                    site=site_id,
+                )
+            ).is_valid()
+
+        def clean_offstudy_form(index):
+            SubjectOffstudyForm(
+                data=dict(
+                    subject_identifier=self.offschedule_subject_identifiers[0],
+                    offstudy_datetime=self.offstudy_datetime,
+                    offstudy_reason=DEAD,
+                    site=site_id,
+                )
+            ).is_valid()
+
+        def save_offstudy(index):
+            SubjectOffstudy.objects.create(
+                subject_identifier=self.offschedule_subject_identifiers[index],
+                offstudy_datetime=self.offstudy_datetime,
+            )
+
+        for name, func, operations in [
+            ("raise_if_offstudy", check, 200),
+            ("CrfOne.save", save_crf, 100),
+            ("NonCrfOne.save", save_non_crf, 100),
+            ("CrfOneForm.is_valid", clean_crf_form, 100),
+            ("NonCrfOneForm.is_valid", clean_non_crf_form, 100),
+            ("SubjectOffstudyForm.is_valid", clean_offstudy_form, 100),
+            ("SubjectOffstudy.save", save_offstudy, self.offstudy_subject_count),
+        ]:
+            results.append(run_benchmark(name, func, size, operations=operations))
+        return results
+
+    def test_enforcement(self):
+        sys.stdout.write(f"\nOff-study enforcement ({connection.vendor})")
+        for size in get_benchmark_sizes():
+            with transaction.atomic():
+                results = self.benchmark_size(size)
+                transaction.set_rollback(True)
+            self.assertEqual(results[0].queries_per_operation, 1)
@@ -0,0 +1,84 @@
+import sys
+from unittest import skipUnless
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, models, transaction
+from django.test import TestCase
+from edc_utils import get_utcnow
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.utils import _get_offstudy_datetime_qs, get_offstudy_datetime
+
+from ..visit_schedule import visit_schedule1
+from .utils import (
+    BENCHMARK_ENABLED,
+    bulk_create_offstudy,
+    get_benchmark_sizes,
+    run_benchmark,
+)
+
+
+@skipUnless(BENCHMARK_ENABLED, "Set EDC_OFFSTUDY_BENCHMARK=1 to run benchmarks")
+class TestIndexBenchmark(TestCase):
+    """Compares the plan and latency of the off-study lookup with
+    and without the subject_identifier index covering
+    offstudy_datetime, added on PostgreSQL by migration 0027.
+
+    Without the covering index, the lookup uses the unique index on
+    subject_identifier.
+
+    Run with:
+        EDC_OFFSTUDY_BENCHMARK=1 python runtests.py
+    """
+
+    def setUp(self):
+        site_visit_schedules._registry = {}
+        site_visit_schedules.loaded = False
+        site_visit_schedules.register(visit_schedule1)
+        self.index = models.Index(
+            fields=["subject_identifier"],
+            include=["offstudy_datetime"],
+            name="benchmark_os_sid_idx",
+        )
+
+    def execute(self, sql) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(str(sql))
+
+    def drop_index(self, schema_editor) -> None:
+        self.execute(
+            schema_editor.sql_delete_index
+            % {
+                "table": schema_editor.quote_name(SubjectOffstudy._meta.db_table),
+                "name": schema_editor.quote_name(self.index.name),
+            }
+        )
+
+    def explain(self, subject_identifier: str) -> str:
+        return _get_offstudy_datetime_qs(subject_identifier).explain()
+
+    def test_covering_index(self):
+        offstudy_datetime = get_utcnow() - relativedelta(years=1)
+        schema_editor = connection.schema_editor()
+        for size in get_benchmark_sizes("100000"):
+            with transaction.atomic():
+                subject_identifiers = bulk_create_offstudy(size, offstudy_datetime)
+                subject_identifier = subject_identifiers[size // 2]
+
+                def lookup(index):
+                    get_offstudy_datetime(subject_identifiers[(index * 7919) % size])
+
+                sys.stdout.write(f"\nPlan without index:\n{self.explain(subject_identifier)}")
+                without_index = run_benchmark(
+                    "get_offstudy_datetime without index", lookup, size
+                )
+
+                self.execute(self.index.create_sql(SubjectOffstudy, schema_editor))
+                sys.stdout.write(f"\nPlan with index:\n{self.explain(subject_identifier)}")
+                with_index = run_benchmark("get_offstudy_datetime with index", lookup, size)
+                self.drop_index(schema_editor)
+
+                self.assertEqual(with_index.queries_per_operation, 1)
+                self.assertEqual(without_index.queries_per_operation, 1)
+                transaction.set_rollback(True)
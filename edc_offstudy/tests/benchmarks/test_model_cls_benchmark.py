@@ -0,0 +1,42 @@
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.test import SimpleTestCase
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+from edc_offstudy.utils import get_offstudy_model_cls
+
+from ..visit_schedule import visit_schedule1
+from .utils import BENCHMARK_ENABLED, run_benchmark
+
+
+@skipUnless(BENCHMARK_ENABLED, "Set EDC_OFFSTUDY_BENCHMARK=1 to run benchmarks")
+class TestModelClsBenchmark(SimpleTestCase):
+    """Compares resolving the Offstudy model class from
+    site_visit_schedules on each call with the cached resolver.
+
+    Run with:
+        EDC_OFFSTUDY_BENCHMARK=1 python runtests.py
+    """
+
+    def setUp(self):
+        site_visit_schedules._registry = {}
+        site_visit_schedules.loaded = False
+        site_visit_schedules.register(visit_schedule1)
+
+    def test_get_offstudy_model_cls(self):
+        operations = 100000
+        uncached = run_benchmark(
+            "resolve offstudy model cls",
+            lambda index: django_apps.get_model(site_visit_schedules.get_offstudy_model()),
+            size=len(site_visit_schedules.registry),
+            operations=operations,
+        )
+        cached = run_benchmark(
+            "get_offstudy_model_cls",
+            lambda index: get_offstudy_model_cls(),
+            size=len(site_visit_schedules.registry),
+            operations=operations,
+        )
+        self.assertEqual(cached.queries_per_operation, 0)
+        self.assertLess(cached.p50, uncached.p50)
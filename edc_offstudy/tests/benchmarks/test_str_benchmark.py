@@ -0,0 +1,55 @@
+from unittest import skipUnless
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.test import SimpleTestCase
+from edc_utils import convert_php_dateformat, get_utcnow
+
+from edc_offstudy.models import SubjectOffstudy
+
+from .utils import BENCHMARK_ENABLED, run_benchmark
+
+
+@skipUnless(BENCHMARK_ENABLED, "Set EDC_OFFSTUDY_BENCHMARK=1 to run benchmarks")
+class TestStrBenchmark(SimpleTestCase):
+    """Compares rendering `OffstudyModelMixin.__str__` with the zone
+    and format built per call against the cached zone and format.
+
+    Run with:
+        EDC_OFFSTUDY_BENCHMARK=1 python runtests.py
+    """
+
+    def test_str(self):
+        operations = 100000
+        report_datetime = get_utcnow()
+        objs = [
+            SubjectOffstudy(
+                subject_identifier=f"{index:09d}",
+                report_datetime=report_datetime - relativedelta(minutes=index),
+            )
+            for index in range(0, operations)
+        ]
+
+        def uncached_str(obj):
+            dte_str = obj.report_datetime.astimezone(ZoneInfo(settings.TIME_ZONE)).strftime(
+                convert_php_dateformat(settings.SHORT_DATETIME_FORMAT)
+            )
+            return f"{obj.subject_identifier} {dte_str}"
+
+        uncached = run_benchmark(
+            "__str__ (per call zone and format)",
+            lambda index: uncached_str(objs[index]),
+            size=operations,
+            operations=operations,
+        )
+        cached = run_benchmark(
+            "__str__",
+            lambda index: str(objs[index]),
+            size=operations,
+            operations=operations,
+        )
+        self.assertEqual(
+            [str(obj) for obj in objs[:10]], [uncached_str(obj) for obj in objs[:10]]
+        )
+        self.assertLess(cached.p50, uncached.p50)
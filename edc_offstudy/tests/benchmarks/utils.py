@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from ...models import SubjectOffstudy
+
+# benchmarks are skipped unless this environment variable is set
+BENCHMARK_ENABLED = bool(os.environ.get("EDC_OFFSTUDY_BENCHMARK"))
+
+
+def get_benchmark_sizes(default: str | None = None) -> list[int]:
+    """Returns the number of subjects to benchmark with from
+    environment variable EDC_OFFSTUDY_BENCHMARK_SIZES,
+    e.g. "1000,10000,100000".
+    """
+    sizes = os.environ.get("EDC_OFFSTUDY_BENCHMARK_SIZES", default or "1000,10000,100000")
+    return [int(size) for size in sizes.split(",")]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    size: int
+    timings: list[float] = field(default_factory=list)
+    queries: int = 0
+
+    @property
+    def operations(self) -> int:
+        return len(self.timings)
+
+    @property
+    def queries_per_operation(self) -> float:
+        return self.queries / self.operations
+
+    @property
+    def p50(self) -> float:
+        return statistics.median(self.timings)
+
+    @property
+    def p95(self) -> float:
+        return statistics.quantiles(self.timings, n=20, method="inclusive")[-1]
+
+    @property
+    def throughput(self) -> float:
+        return self.operations / sum(self.timings)
+
+    def __str__(self):
+        return (
+            f"{self.name:<45} {connection.vendor:<10} subjects={self.size:<7} "
+            f"ops={self.operations:<6} queries/op={self.queries_per_operation:<5.2f} "
+            f"p50={self.p50 * 1000:.3f}ms p95={self.p95 * 1000:.3f}ms "
+            f"throughput={self.throughput:.0f}/s"
+        )
+
+
+def run_benchmark(
+    name: str, func: Callable[[int], None], size: int, operations: int = 200
+) -> BenchmarkResult:
+    """Calls `func(index)` `operations` times and writes the result
+    to stdout.
+    """
+    result = BenchmarkResult(name=name, size=size)
+    for index in range(0, operations):
+        # the connection keeps only the last 9000 queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func(index)
+            result.timings.append(time.perf_counter() - start)
+        result.queries += len(ctx.captured_queries)
+    sys.stdout.write(f"\n{result}")
+    return result
+
+
+def bulk_create_offstudy(
+    size: int, offstudy_datetime: datetime, batch_size: int = 5000
+) -> list[str]:
+    """Creates `size` SubjectOffstudy instances without calling save()
+    and returns the subject identifiers.
+    """
+    subject_identifiers = [f"B{index:09d}" for index in range(0, size)]
+    SubjectOffstudy.objects.bulk_create(
+        [
+            SubjectOffstudy(
+                id=uuid.uuid4(),
+                subject_identifier=subject_identifier,
+                offstudy_datetime=offstudy_datetime,
+                report_datetime=offstudy_datetime,
+            )
+            for subject_identifier in subject_identifiers
+        ],
+        batch_size=batch_size,
+    )
+    analyze(SubjectOffstudy._meta.db_table)
+    return subject_identifiers
+
+
+def analyze(db_table: str) -> None:
+    """Updates planner statistics for the table."""
+    sql = (
+        f"ANALYZE TABLE {db_table}" if connection.vendor == "mysql" else f"ANALYZE {db_table}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase
+from edc_action_item import site_action_items
+from edc_facility.import_holidays import import_holidays
+from edc_utils import get_dob, get_utcnow
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+from ..action_items import EndOfStudyAction
+from ..models import SubjectOffstudy
+from .models import OffScheduleOne, SubjectConsent
+from .visit_schedule import visit_schedule1
+
+
+class Helper:
+    """Consents, puts on schedule and takes off study subjects
+    for the tests.
+    """
+
+    def __init__(self, consent_datetime: datetime | None = None):
+        self.consent_datetime = consent_datetime or get_utcnow() - relativedelta(years=4)
+        self.schedule = visit_schedule1.schedules.get("schedule1")
+
+    def consent_and_put_on_schedule(self, subject_identifier: str) -> SubjectConsent:
+        subject_consent = SubjectConsent.objects.create(
+            subject_identifier=subject_identifier,
+            consent_datetime=self.consent_datetime,
+            dob=get_dob(age_in_years=25, now=self.consent_datetime),
+        )
+        self.schedule.put_on_schedule(
+            subject_identifier=subject_identifier,
+            onschedule_datetime=self.consent_datetime,
+        )
+        return subject_consent
+
+    def take_off_study(
+        self, subject_identifier: str, offstudy_datetime: datetime
+    ) -> SubjectOffstudy:
+        OffScheduleOne.objects.create(
+            subject_identifier=subject_identifier,
+            report_datetime=offstudy_datetime,
+            offschedule_datetime=offstudy_datetime,
+        )
+        return SubjectOffstudy.objects.create(
+            subject_identifier=subject_identifier,
+            offstudy_datetime=offstudy_datetime,
+        )
+
+
+class OffstudyTestCaseMixin:
+    """TestCase mixin to register `visit_schedule1` and the end of
+    study action and to consent and put `subject_identifiers` on
+    schedule.
+
+    Sets `helper`, `subject_identifier`, the first of
+    `subject_identifiers`, and `offstudy_datetime`.
+    """
+
+    subject_identifiers: list[str] = ["111111111"]
+
+    @classmethod
+    def setUpTestData(cls):
+        import_holidays()
+
+    def setUp(self):
+        if not isinstance(self, TestCase):
+            # a TransactionTestCase does not call setUpTestData
+            import_holidays()
+        site_visit_schedules._registry = {}
+        site_visit_schedules.loaded = False
+        site_visit_schedules.register(visit_schedule1)
+        site_action_items.registry = {}
+        site_action_items.register(EndOfStudyAction)
+        self.helper = Helper()
+        self.subject_identifiers = list(self.subject_identifiers)
+        self.subject_identifier = self.subject_identifiers[0]
+        for subject_identifier in self.subject_identifiers:
+            self.helper.consent_and_put_on_schedule(subject_identifier)
+        self.offstudy_datetime = self.helper.consent_datetime + relativedelta(days=10)
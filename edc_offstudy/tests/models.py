@@ -10,6 +10,7 @@ from edc_visit_schedule.model_mixins import OffScheduleModelMixin, OnScheduleMod
 from edc_visit_tracking.model_mixins import VisitTrackingCrfModelMixin
 from edc_visit_tracking.models import SubjectVisit
 
+from ..managers import OffstudyManager
 from ..model_mixins import (
     OffstudyCrfModelMixin,
     OffstudyModelMixin,
@@ -64,6 +65,8 @@ class CrfOne(SiteModelMixin, OffstudyCrfModelMixin, VisitTrackingCrfModelMixin,
 
     f3 = models.CharField(max_length=50, null=True, blank=True)
 
+    objects = OffstudyManager()
+
 
 class NonCrfOne(
     SiteModelMixin,
@@ -73,6 +76,8 @@ class NonCrfOne(
 ):
     report_datetime = models.DateTimeField(default=get_utcnow)
 
+    objects = OffstudyManager()
+
     class Meta(OffstudyNonCrfModelMixin.Meta):
         pass
 
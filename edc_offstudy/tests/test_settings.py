@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import os
 import sys
 from pathlib import Path
 
@@ -61,5 +62,20 @@ project_settings = DefaultTestSettings(
     add_dashboard_middleware=True,
 ).settings
 
+# e.g. to run the benchmarks on a local PostgreSQL
+if os.environ.get("EDC_OFFSTUDY_DATABASE") == "postgresql":
+    project_settings.update(
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": os.environ.get("PGDATABASE", "edc_offstudy"),
+                "USER": os.environ.get("PGUSER", "postgres"),
+                "PASSWORD": os.environ.get("PGPASSWORD", ""),
+                "HOST": os.environ.get("PGHOST", "localhost"),
+                "PORT": os.environ.get("PGPORT", "5432"),
+            }
+        }
+    )
+
 for k, v in project_settings.items():
     setattr(sys.modules[__name__], k, v)
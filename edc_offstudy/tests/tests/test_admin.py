@@ -0,0 +1,38 @@
+from django.contrib import admin
+from django.test import TestCase
+
+from edc_offstudy.admin_site import edc_offstudy_admin
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.paginator import EstimatedCountPaginator, get_estimated_count
+
+from ..helper import OffstudyTestCaseMixin
+
+
+class TestAdmin(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        for subject_identifier in self.subject_identifiers:
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+
+    def test_model_admin(self):
+        model_admin = edc_offstudy_admin._registry[SubjectOffstudy]
+        self.assertIsInstance(model_admin, admin.ModelAdmin)
+        self.assertEqual(model_admin.date_hierarchy, "offstudy_datetime")
+        self.assertIs(model_admin.paginator, EstimatedCountPaginator)
+        self.assertFalse(model_admin.show_full_result_count)
+        self.assertNotIn("__str__", model_admin.list_display)
+
+    def test_paginator_counts_if_no_estimate(self):
+        queryset = SubjectOffstudy.objects.all().order_by("-offstudy_datetime")
+        # only on PostgreSQL
+        self.assertIsNone(get_estimated_count(queryset))
+        paginator = EstimatedCountPaginator(queryset, 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_no_estimate_if_filtered(self):
+        queryset = SubjectOffstudy.objects.filter(subject_identifier="111111111")
+        self.assertIsNone(get_estimated_count(queryset))
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 1)
@@ -0,0 +1,94 @@
+from asgiref.sync import sync_to_async
+from dateutil.relativedelta import relativedelta
+from django import forms
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.middleware import OffstudyCacheMiddleware
+from edc_offstudy.request_cache import get_offstudy_cache
+from edc_offstudy.utils import (
+    afind_offstudy_violations,
+    aget_offstudy_and_offschedule_datetimes,
+    aget_offstudy_datetimes,
+    araise_if_offstudy,
+    find_offstudy_violations,
+    get_offstudy_and_offschedule_datetimes,
+)
+
+from ..forms import NonCrfOneForm
+from ..helper import OffstudyTestCaseMixin
+from ..models import OffScheduleOne
+
+
+class TestAsync(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        for subject_identifier in self.subject_identifiers[:2]:
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+
+    async def test_araise_if_offstudy(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with self.assertRaises(OffstudyError):
+            await araise_if_offstudy(
+                subject_identifier="111111111", report_datetime=report_datetime
+            )
+        await araise_if_offstudy(
+            subject_identifier="111111111", report_datetime=self.offstudy_datetime
+        )
+        await araise_if_offstudy(
+            subject_identifier="333333333", report_datetime=report_datetime
+        )
+
+    async def test_aget_offstudy_datetimes(self):
+        self.assertEqual(
+            await aget_offstudy_datetimes(self.subject_identifiers, chunk_size=1),
+            {"111111111": self.offstudy_datetime, "222222222": self.offstudy_datetime},
+        )
+
+    async def test_afind_offstudy_violations(self):
+        rows = [
+            (subject_identifier, self.offstudy_datetime + relativedelta(days=days))
+            for subject_identifier in self.subject_identifiers
+            for days in [-1, 0, 1]
+        ]
+        self.assertEqual(
+            await afind_offstudy_violations(rows),
+            await sync_to_async(find_offstudy_violations)(rows),
+        )
+
+    async def test_aget_offstudy_and_offschedule_datetimes(self):
+        for subject_identifier in self.subject_identifiers:
+            args = (
+                subject_identifier,
+                self.offstudy_datetime + relativedelta(days=1),
+                OffScheduleOne,
+            )
+            self.assertEqual(
+                await aget_offstudy_and_offschedule_datetimes(*args),
+                await sync_to_async(get_offstudy_and_offschedule_datetimes)(*args),
+            )
+
+    async def test_async_middleware(self):
+        async def get_response(request):
+            self.assertIsNotNone(get_offstudy_cache())
+            return HttpResponse()
+
+        middleware = OffstudyCacheMiddleware(get_response)
+        await middleware(RequestFactory().get("/"))
+        self.assertIsNone(get_offstudy_cache())
+
+    async def test_non_crf_form_hook(self):
+        form = NonCrfOneForm(
+            data=dict(
+                subject_identifier="111111111",
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+                site=settings.SITE_ID,
+            )
+        )
+        self.assertFalse(await sync_to_async(form.is_valid)())
+        with self.assertRaises(forms.ValidationError):
+            await form.araise_if_offstudy_by_report_datetime()
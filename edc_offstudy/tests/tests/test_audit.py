@@ -0,0 +1,147 @@
+import csv
+import json
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+from edc_appointment.models import Appointment
+from edc_visit_tracking.constants import SCHEDULED
+from edc_visit_tracking.models import SubjectVisit
+
+from edc_offstudy.audit import (
+    ViolationWriter,
+    get_audit_models,
+    iter_offstudy_violations,
+    run_audit,
+)
+from edc_offstudy.models import SubjectOffstudy
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import CrfOne, NonCrfOne
+
+
+class AuditTestMixin(OffstudyTestCaseMixin):
+    subject_identifiers = ["111111111", "222222222"]
+
+    def setUp(self):
+        super().setUp()
+        for subject_identifier in self.subject_identifiers:
+            appointment = Appointment.objects.filter(
+                subject_identifier=subject_identifier
+            ).order_by("appt_datetime")[0]
+            subject_visit = SubjectVisit.objects.create(
+                appointment=appointment,
+                visit_schedule_name=appointment.visit_schedule_name,
+                schedule_name=appointment.schedule_name,
+                visit_code=appointment.visit_code,
+                report_datetime=appointment.appt_datetime,
+                reason=SCHEDULED,
+            )
+            CrfOne.objects.create(
+                subject_visit=subject_visit, report_datetime=appointment.appt_datetime
+            )
+            for days in [1, 2]:
+                NonCrfOne.objects.create(
+                    subject_identifier=subject_identifier,
+                    report_datetime=self.helper.consent_datetime + relativedelta(days=days),
+                )
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+        # backdate the off-study report for one subject
+        self.offstudy_datetime = self.helper.consent_datetime + relativedelta(days=1)
+        SubjectOffstudy.objects.filter(subject_identifier="111111111").update(
+            offstudy_datetime=self.offstudy_datetime
+        )
+
+
+class TestAudit(AuditTestMixin, TestCase):
+    def test_get_audit_models(self):
+        labels = [model_cls._meta.label_lower for model_cls in get_audit_models()]
+        for label in [
+            "edc_offstudy.crfone",
+            "edc_offstudy.noncrfone",
+            "edc_visit_tracking.subjectvisit",
+            "edc_appointment.appointment",
+        ]:
+            self.assertIn(label, labels)
+        self.assertEqual(get_audit_models(["edc_offstudy.CrfOne"]), [CrfOne])
+
+    def test_iter_offstudy_violations(self):
+        violations = list(iter_offstudy_violations(NonCrfOne, chunk_size=1))
+        self.assertEqual(len(violations), 1)
+        self.assertEqual(violations[0].subject_identifier, "111111111")
+        self.assertEqual(
+            violations[0].report_datetime,
+            self.helper.consent_datetime + relativedelta(days=2),
+        )
+        self.assertEqual(violations[0].offstudy_datetime, self.offstudy_datetime)
+
+    def test_iter_offstudy_violations_crf(self):
+        self.assertEqual(list(iter_offstudy_violations(CrfOne)), [])
+        SubjectOffstudy.objects.filter(subject_identifier="222222222").update(
+            offstudy_datetime=self.helper.consent_datetime - relativedelta(days=1)
+        )
+        violations = list(iter_offstudy_violations(CrfOne))
+        self.assertEqual([v.subject_identifier for v in violations], ["222222222"])
+        self.assertEqual(violations[0].model, "edc_offstudy.crfone")
+
+    def test_annotate_offstudy_crf(self):
+        SubjectOffstudy.objects.filter(subject_identifier="222222222").update(
+            offstudy_datetime=self.helper.consent_datetime - relativedelta(days=1)
+        )
+        with self.assertNumQueries(1):
+            rows = dict(
+                CrfOne.objects.annotate_offstudy().values_list(
+                    "subject_visit__subject_identifier", "is_after_offstudy"
+                )
+            )
+        self.assertEqual(rows, {"111111111": False, "222222222": True})
+
+    def test_command_csv(self):
+        out = StringIO()
+        call_command(
+            "audit_offstudy",
+            "--models",
+            "edc_offstudy.noncrfone",
+            stdout=out,
+            stderr=StringIO(),
+        )
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["model"], "edc_offstudy.noncrfone")
+        self.assertEqual(rows[0]["offstudy_datetime"], self.offstudy_datetime.isoformat())
+
+    def test_command_jsonl(self):
+        out = StringIO()
+        call_command("audit_offstudy", "--format", "jsonl", stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertIn("edc_offstudy.noncrfone", [row["model"] for row in rows])
+        self.assertEqual({row["subject_identifier"] for row in rows}, {"111111111"})
+
+    def test_command_invalid_model(self):
+        self.assertRaises(
+            CommandError,
+            call_command,
+            "audit_offstudy",
+            "--models",
+            "edc_offstudy.subjectconsent",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+
+class TestAuditWorkers(AuditTestMixin, TransactionTestCase):
+    """Runs the audit in forked worker processes against data
+    committed to the test database.
+    """
+
+    def audit(self, **kwargs) -> str:
+        out = StringIO()
+        run_audit(ViolationWriter(out, fmt="jsonl"), get_audit_models(), **kwargs)
+        return out.getvalue()
+
+    def test_workers_match_sequential(self):
+        expected = self.audit()
+        self.assertTrue(expected)
+        self.assertEqual(self.audit(workers=2), expected)
+        self.assertEqual(self.audit(workers=3, by_site=True, chunk_size=1), expected)
@@ -0,0 +1,209 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from edc_utils import get_utcnow
+from edc_visit_tracking.constants import COMPLETED_PROTOCOL_VISIT
+
+from edc_offstudy.closeout import CREATED, FAILED, SKIPPED, close_out_subjects
+from edc_offstudy.models import SubjectOffstudy
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import OffScheduleOne, OnScheduleOne
+from ..visit_schedule import visit_schedule1
+
+
+class TestCloseout(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        # 333333333 stays on schedule
+        for subject_identifier in self.subject_identifiers[:2]:
+            OffScheduleOne.objects.create(
+                subject_identifier=subject_identifier,
+                report_datetime=self.offstudy_datetime,
+                offschedule_datetime=self.offstudy_datetime,
+            )
+
+    def test_close_out_subjects(self):
+        result = close_out_subjects(
+            self.subject_identifiers, offstudy_datetime=self.offstudy_datetime, batch_size=2
+        )
+        self.assertEqual([row.status for row in result.rows], [CREATED, CREATED, FAILED])
+        self.assertEqual(result.failures[0].subject_identifier, "333333333")
+        self.assertIn("still on a schedule", result.failures[0].message)
+        self.assertEqual(
+            set(
+                SubjectOffstudy.objects.filter(
+                    offstudy_reason=COMPLETED_PROTOCOL_VISIT
+                ).values_list("subject_identifier", flat=True)
+            ),
+            {"111111111", "222222222"},
+        )
+        obj = SubjectOffstudy.objects.get(subject_identifier="111111111")
+        self.assertGreater(obj.history.count(), 0)
+
+    def test_site_from_onschedule(self):
+        site = Site.objects.create(id=20, name="site_two", domain="site_two.example.com")
+        OnScheduleOne.objects.filter(subject_identifier="222222222").update(site=site)
+        close_out_subjects(self.subject_identifiers, offstudy_datetime=self.offstudy_datetime)
+        self.assertEqual(
+            dict(SubjectOffstudy.objects.values_list("subject_identifier", "site_id")),
+            {"111111111": settings.SITE_ID, "222222222": site.id},
+        )
+
+    def test_rerun_skips_subjects_off_study(self):
+        close_out_subjects(
+            self.subject_identifiers[:1], offstudy_datetime=self.offstudy_datetime
+        )
+        result = close_out_subjects(
+            self.subject_identifiers, offstudy_datetime=self.offstudy_datetime
+        )
+        self.assertEqual((result.created, result.skipped, result.failed), (1, 1, 1))
+        self.assertEqual(result.rows[0].status, SKIPPED)
+        self.assertEqual(SubjectOffstudy.objects.count(), 2)
+
+    def test_offstudy_datetime_before_offschedule_datetime_fails(self):
+        result = close_out_subjects(
+            self.subject_identifiers[:1],
+            offstudy_datetime=self.offstudy_datetime - relativedelta(days=1),
+        )
+        self.assertEqual(result.failed, 1)
+        self.assertIn("cannot be before any `offschedule` datetime", result.rows[0].message)
+
+    def test_subject_not_on_schedule_fails(self):
+        result = close_out_subjects(
+            ["111111111", "11111111X"], offstudy_datetime=self.offstudy_datetime
+        )
+        self.assertEqual([row.status for row in result.rows], [CREATED, FAILED])
+        self.assertIn("Not on any schedule", result.rows[1].message)
+        self.assertFalse(
+            SubjectOffstudy.objects.filter(subject_identifier="11111111X").exists()
+        )
+
+    def test_unexpected_exception_fails_subject(self):
+        with patch.object(SubjectOffstudy, "save", side_effect=RuntimeError("Oops")):
+            result = close_out_subjects(
+                self.subject_identifiers[:2], offstudy_datetime=self.offstudy_datetime
+            )
+        self.assertEqual(result.failed, 2)
+        self.assertEqual(result.rows[0].message, "RuntimeError: Oops")
+
+    def test_future_offstudy_datetime_raises(self):
+        self.assertRaises(
+            ValidationError,
+            close_out_subjects,
+            self.subject_identifiers,
+            offstudy_datetime=get_utcnow() + relativedelta(days=1),
+        )
+        self.assertEqual(SubjectOffstudy.objects.count(), 0)
+
+    def test_off_schedule(self):
+        result = close_out_subjects(
+            self.subject_identifiers,
+            offstudy_datetime=self.offstudy_datetime,
+            off_schedule=True,
+        )
+        self.assertEqual((result.created, result.failed, result.offschedule), (3, 0, 1))
+        self.assertEqual(result.rows[0].schedules, ())
+        self.assertEqual(
+            result.rows[2].schedules, (f"{visit_schedule1.name}.{self.helper.schedule.name}",)
+        )
+        offschedule_obj = OffScheduleOne.objects.get(subject_identifier="333333333")
+        self.assertEqual(offschedule_obj.offschedule_datetime, self.offstudy_datetime)
+        self.assertEqual(
+            offschedule_obj.site_id,
+            OnScheduleOne.objects.get(subject_identifier="333333333").site_id,
+        )
+        self.assertEqual(SubjectOffstudy.objects.count(), 3)
+
+    def test_off_schedule_offschedule_datetime_field_attr(self):
+        with patch.object(
+            OffScheduleOne, "offschedule_datetime_field_attr", "report_datetime"
+        ):
+            result = close_out_subjects(
+                ["333333333"], offstudy_datetime=self.offstudy_datetime, off_schedule=True
+            )
+        self.assertEqual((result.created, result.offschedule), (1, 1))
+        self.assertEqual(
+            OffScheduleOne.objects.get(subject_identifier="333333333").offschedule_datetime,
+            self.offstudy_datetime,
+        )
+
+    def test_off_schedule_failure_rolls_back_subject(self):
+        # before the subject was put on schedule
+        result = close_out_subjects(
+            ["333333333"],
+            offstudy_datetime=self.helper.consent_datetime - relativedelta(days=1),
+            off_schedule=True,
+        )
+        self.assertEqual(result.failed, 1)
+        self.assertFalse(
+            OffScheduleOne.objects.filter(subject_identifier="333333333").exists()
+        )
+
+    def test_dry_run(self):
+        result = close_out_subjects(
+            self.subject_identifiers,
+            offstudy_datetime=self.offstudy_datetime,
+            off_schedule=True,
+            dry_run=True,
+        )
+        self.assertEqual((result.created, result.failed, result.offschedule), (3, 0, 1))
+        self.assertTrue(result.summary().startswith("Dry run, rolled back. 3 created"))
+        self.assertEqual(SubjectOffstudy.objects.count(), 0)
+        self.assertFalse(
+            OffScheduleOne.objects.filter(subject_identifier="333333333").exists()
+        )
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "closeout.csv")
+            out = StringIO()
+            call_command(
+                "closeout_offstudy",
+                "--subjects",
+                *self.subject_identifiers,
+                "--offstudy-datetime",
+                self.offstudy_datetime.isoformat(),
+                "--report",
+                path,
+                stdout=out,
+            )
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        self.assertIn("2 created, 0 skipped, 1 failed", out.getvalue())
+        self.assertEqual([row["status"] for row in rows], [CREATED, CREATED, FAILED])
+
+    def test_command_without_subjects_raises(self):
+        self.assertRaises(
+            CommandError,
+            call_command,
+            "closeout_offstudy",
+            "--offstudy-datetime",
+            self.offstudy_datetime.isoformat(),
+        )
+
+    def test_command_off_schedule_dry_run(self):
+        out = StringIO()
+        call_command(
+            "closeout_offstudy",
+            "--subjects",
+            *self.subject_identifiers,
+            "--offstudy-datetime",
+            self.offstudy_datetime.isoformat(),
+            "--off-schedule",
+            "--dry-run",
+            stdout=out,
+        )
+        self.assertIn("Dry run, rolled back. 3 created, 0 skipped, 0 failed", out.getvalue())
+        self.assertEqual(SubjectOffstudy.objects.count(), 0)
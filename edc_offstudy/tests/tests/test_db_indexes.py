@@ -0,0 +1,82 @@
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from edc_offstudy.db_indexes import AddPostgreSQLIndex
+from edc_offstudy.models import SubjectOffstudy
+
+from ..models import SubjectOffstudy2
+
+
+class TestDbIndexes(TestCase):
+    def setUp(self):
+        self.operation = AddPostgreSQLIndex(
+            "subjectoffstudy",
+            models.Index(
+                fields=["subject_identifier"],
+                include=["offstudy_datetime"],
+                name="test_os_sid_idx",
+            ),
+        )
+        self.state = ProjectState.from_apps(django_apps)
+
+    def get_index_names(self) -> list[str]:
+        with connection.cursor() as cursor:
+            return list(
+                connection.introspection.get_constraints(
+                    cursor, SubjectOffstudy._meta.db_table
+                )
+            )
+
+    def test_model_checks(self):
+        self.assertEqual(SubjectOffstudy.check(), [])
+        self.assertEqual(SubjectOffstudy2.check(), [])
+
+    def test_operation(self):
+        name, args, kwargs = self.operation.deconstruct()
+        self.assertEqual(name, "AddPostgreSQLIndex")
+        self.assertEqual(AddPostgreSQLIndex(*args, **kwargs).index, self.operation.index)
+        self.assertEqual(
+            self.operation.migration_name_fragment, "subjectoffstudy_test_os_sid_idx"
+        )
+        new_state = self.state.clone()
+        self.operation.state_forwards("edc_offstudy", new_state)
+        self.assertNotIn(
+            "test_os_sid_idx",
+            [
+                index.name
+                for index in new_state.models["edc_offstudy", "subjectoffstudy"].options[
+                    "indexes"
+                ]
+            ],
+        )
+
+    @skipUnless(connection.vendor != "postgresql", "Not a no-op on PostgreSQL")
+    def test_operation_noop(self):
+        schema_editor = connection.schema_editor()
+        with CaptureQueriesContext(connection) as ctx:
+            self.operation.database_forwards(
+                "edc_offstudy", schema_editor, self.state, self.state
+            )
+            self.operation.database_backwards(
+                "edc_offstudy", schema_editor, self.state, self.state
+            )
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertNotIn("test_os_sid_idx", self.get_index_names())
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    def test_operation_postgresql(self):
+        with connection.schema_editor() as schema_editor:
+            self.operation.database_forwards(
+                "edc_offstudy", schema_editor, self.state, self.state
+            )
+        self.assertIn("test_os_sid_idx", self.get_index_names())
+        with connection.schema_editor() as schema_editor:
+            self.operation.database_backwards(
+                "edc_offstudy", schema_editor, self.state, self.state
+            )
+        self.assertNotIn("test_os_sid_idx", self.get_index_names())
@@ -0,0 +1,118 @@
+from unittest import skipUnless
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from edc_offstudy.db_triggers import (
+    InstallOffstudyTrigger,
+    get_create_trigger_sql,
+    get_offstudy_trigger_operations,
+)
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.utils import (
+    OFFSTUDY_TRIGGER_MESSAGE_PREFIX,
+    offstudy_db_triggers_enabled,
+    translate_offstudy_trigger_error,
+)
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import CrfOne, NonCrfOne
+
+
+class TestDbTriggers(OffstudyTestCaseMixin, TestCase):
+    def test_enabled(self):
+        self.assertFalse(offstudy_db_triggers_enabled())
+        with override_settings(EDC_OFFSTUDY_DB_TRIGGERS=True):
+            self.assertEqual(offstudy_db_triggers_enabled(), connection.vendor == "postgresql")
+
+    @skipUnless(connection.vendor != "postgresql", "Reads pg_trigger on PostgreSQL")
+    @override_settings(EDC_OFFSTUDY_DB_TRIGGERS=True)
+    def test_enabled_for_model_not_postgresql(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(offstudy_db_triggers_enabled(model_cls=NonCrfOne))
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    @override_settings(EDC_OFFSTUDY_DB_TRIGGERS=True)
+    def test_enabled_for_model_with_trigger_only(self):
+        self.assertFalse(offstudy_db_triggers_enabled(model_cls=NonCrfOne))
+        operation = InstallOffstudyTrigger("edc_offstudy.noncrfone")
+        with connection.schema_editor() as schema_editor:
+            operation.database_forwards("edc_offstudy", schema_editor, None, None)
+        with self.assertNumQueries(1):
+            self.assertTrue(offstudy_db_triggers_enabled(model_cls=NonCrfOne))
+            self.assertFalse(offstudy_db_triggers_enabled(model_cls=CrfOne))
+
+    def test_create_trigger_sql(self):
+        sql = get_create_trigger_sql(NonCrfOne, connection.ops.quote_name)[0]
+        self.assertIn("_subject_identifier := NEW.subject_identifier;", sql)
+        self.assertIn('FROM "edc_offstudy_subjectoffstudy"', sql)
+        self.assertIn("USING ERRCODE = 'check_violation'", sql)
+        sql = get_create_trigger_sql(CrfOne, connection.ops.quote_name)[0]
+        self.assertIn(
+            'FROM "edc_visit_tracking_subjectvisit" WHERE "id" = NEW."subject_visit_id";', sql
+        )
+
+    def test_operations(self):
+        labels = [operation.model for operation in get_offstudy_trigger_operations()]
+        self.assertIn("edc_offstudy.crfone", labels)
+        self.assertIn("edc_offstudy.noncrfone", labels)
+        operation = InstallOffstudyTrigger("edc_offstudy.noncrfone")
+        self.assertEqual(
+            operation.deconstruct(),
+            ("InstallOffstudyTrigger", ["edc_offstudy.noncrfone"], {}),
+        )
+
+    @skipUnless(connection.vendor != "postgresql", "Not a no-op on PostgreSQL")
+    def test_operation_noop(self):
+        operation = InstallOffstudyTrigger("edc_offstudy.noncrfone")
+        schema_editor = connection.schema_editor()
+        with CaptureQueriesContext(connection) as ctx:
+            operation.database_forwards("edc_offstudy", schema_editor, None, None)
+            operation.database_backwards("edc_offstudy", schema_editor, None, None)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_translate_offstudy_trigger_error(self):
+        with self.assertRaises(OffstudyError) as cm:
+            with translate_offstudy_trigger_error():
+                raise IntegrityError(f"{OFFSTUDY_TRIGGER_MESSAGE_PREFIX}Subject off study.\n")
+        self.assertEqual(str(cm.exception), "Subject off study.")
+        with self.assertRaises(IntegrityError):
+            with translate_offstudy_trigger_error():
+                raise IntegrityError("UNIQUE constraint failed")
+
+    def test_translate_offstudy_trigger_error_in_atomic_block(self):
+        """Asserts a rejected row does not leave the transaction
+        marked for rollback.
+        """
+        with transaction.atomic():
+            with self.assertRaises(OffstudyError):
+                with translate_offstudy_trigger_error():
+                    with transaction.mark_for_rollback_on_error():
+                        raise IntegrityError(
+                            f"{OFFSTUDY_TRIGGER_MESSAGE_PREFIX}Subject off study.\n"
+                        )
+            self.assertFalse(transaction.get_rollback())
+            self.assertEqual(NonCrfOne.objects.count(), 0)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    @override_settings(EDC_OFFSTUDY_DB_TRIGGERS=True)
+    def test_trigger(self):
+        operation = InstallOffstudyTrigger("edc_offstudy.noncrfone")
+        with connection.schema_editor() as schema_editor:
+            operation.database_forwards("edc_offstudy", schema_editor, None, None)
+        obj = NonCrfOne.objects.create(
+            subject_identifier=self.subject_identifier,
+            report_datetime=self.helper.consent_datetime,
+        )
+        self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+        with transaction.atomic():
+            self.assertRaises(
+                IntegrityError,
+                NonCrfOne.objects.filter(pk=obj.pk).update,
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+            )
+        obj.report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with transaction.atomic():
+            self.assertRaises(OffstudyError, obj.save)
@@ -0,0 +1,189 @@
+import os
+import threading
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from edc_offstudy.events import (
+    FileQueueDispatcher,
+    OffstudyEvent,
+    QueueDispatcher,
+    get_offstudy_event_dispatcher,
+    subject_offstudy,
+    subject_offstudy_batch,
+)
+from edc_offstudy.utils import get_uncommitted
+
+from ..helper import OffstudyTestCaseMixin
+
+
+class TestEvents(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        self.events = []
+        self.batches = []
+
+    def on_event(self, sender, event, **kwargs):
+        self.events.append(event)
+
+    def on_batch(self, sender, events, **kwargs):
+        self.batches.append(events)
+
+    def connect(self):
+        subject_offstudy.connect(self.on_event)
+        subject_offstudy_batch.connect(self.on_batch)
+        self.addCleanup(subject_offstudy.disconnect, self.on_event)
+        self.addCleanup(subject_offstudy_batch.disconnect, self.on_batch)
+
+    def take_off_study(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            objs = [
+                self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+                for subject_identifier in self.subject_identifiers
+            ]
+            # not sent before commit
+            self.assertEqual(self.events, [])
+        return objs
+
+    def test_event_sent_on_commit(self):
+        self.connect()
+        objs = self.take_off_study()
+        self.assertEqual(
+            self.events,
+            [
+                OffstudyEvent(
+                    obj.subject_identifier,
+                    self.offstudy_datetime,
+                    "edc_offstudy.subjectoffstudy",
+                    str(obj.pk),
+                    True,
+                )
+                for obj in objs
+            ],
+        )
+        self.assertEqual(self.batches, [])
+
+    def test_event_json(self):
+        event = OffstudyEvent("111111111", self.offstudy_datetime, "a.b", "1", True)
+        self.assertEqual(OffstudyEvent.from_json(event.to_json()), event)
+
+    @override_settings(
+        EDC_OFFSTUDY_EVENT_DISPATCHER="edc_offstudy.events.QueueDispatcher",
+        EDC_OFFSTUDY_EVENT_DISPATCHER_OPTIONS={"batch_size": 2},
+    )
+    def test_queue_dispatcher(self):
+        self.connect()
+        dispatcher = get_offstudy_event_dispatcher()
+        self.assertIsInstance(dispatcher, QueueDispatcher)
+        self.take_off_study()
+        self.assertEqual(len(self.events), 3)
+        self.assertEqual(self.batches, [self.events[:2]])
+        self.assertEqual(dispatcher.flush(), 1)
+        self.assertEqual(self.batches, [self.events[:2], self.events[2:]])
+        self.assertEqual(dispatcher.flush(), 0)
+
+    def test_file_queue_dispatcher(self):
+        self.connect()
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "events.jsonl")
+            with override_settings(
+                EDC_OFFSTUDY_EVENT_DISPATCHER="edc_offstudy.events.FileQueueDispatcher",
+                EDC_OFFSTUDY_EVENT_QUEUE_PATH=path,
+            ):
+                self.assertIsInstance(get_offstudy_event_dispatcher(), FileQueueDispatcher)
+                self.take_off_study()
+                self.assertEqual(self.batches, [])
+                out = StringIO()
+                call_command("flush_offstudy_events", stdout=out)
+                self.assertIn("3 off-study events sent", out.getvalue())
+                self.assertEqual(self.batches, [self.events])
+                self.assertFalse(os.path.exists(path))
+                # a second consumer finds nothing
+                self.assertEqual(FileQueueDispatcher().flush(), 0)
+        self.assertIsNone(get_offstudy_event_dispatcher())
+
+    def test_queue_dispatcher_max_delay(self):
+        self.connect()
+        dispatcher = QueueDispatcher(batch_size=10, max_delay=0.05)
+        event = OffstudyEvent("111111111", self.offstudy_datetime, "a.b", "1", True)
+        dispatcher.dispatch(event)
+        timer = dispatcher.timer
+        timer.join()
+        self.assertEqual(self.batches, [[event]])
+        self.assertIsNone(dispatcher.timer)
+
+    def test_file_queue_dispatcher_failed_flush(self):
+        event = OffstudyEvent("111111111", self.offstudy_datetime, "a.b", "1", True)
+
+        def on_batch(sender, events, **kwargs):
+            raise RuntimeError("Oops")
+
+        with TemporaryDirectory() as tmpdir:
+            dispatcher = FileQueueDispatcher(os.path.join(tmpdir, "events.jsonl"))
+            dispatcher.dispatch(event)
+            subject_offstudy_batch.connect(on_batch)
+            try:
+                self.assertRaises(RuntimeError, dispatcher.flush)
+            finally:
+                subject_offstudy_batch.disconnect(on_batch)
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
+            dispatcher.dispatch(event)
+            self.connect()
+            # the file left by the failed flush is sent first
+            self.assertEqual(dispatcher.flush(), 2)
+            self.assertEqual(self.batches, [[event], [event]])
+            self.assertEqual(os.listdir(tmpdir), [])
+
+    def test_receiver_error_logged(self):
+        def on_event(sender, event, **kwargs):
+            raise RuntimeError("Oops")
+
+        subject_offstudy.connect(on_event)
+        self.addCleanup(subject_offstudy.disconnect, on_event)
+        self.connect()
+        with self.assertLogs("edc_offstudy.events", "ERROR") as cm:
+            self.take_off_study()
+        self.assertEqual(len(cm.records), 3)
+        self.assertEqual(len(self.events), 3)
+
+
+class TestEventsTransaction(OffstudyTestCaseMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.events = []
+        subject_offstudy.connect(self.on_event)
+        self.addCleanup(subject_offstudy.disconnect, self.on_event)
+
+    def on_event(self, sender, event, **kwargs):
+        self.events.append(event)
+
+    def test_rolled_back_event_discarded(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+                raise RuntimeError()
+        self.assertEqual(self.events, [])
+        with transaction.atomic():
+            self.assertEqual(get_uncommitted(None, "events", dict), {})
+            self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+        self.assertEqual([event.created for event in self.events], [True])
+
+    def test_pending_events_per_connection(self):
+        other_thread_events = []
+        with transaction.atomic():
+            self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+            self.assertEqual(len(get_uncommitted(None, "events", dict)), 1)
+            thread = threading.Thread(
+                target=lambda: other_thread_events.append(
+                    get_uncommitted(None, "events", dict)
+                )
+            )
+            thread.start()
+            thread.join()
+        self.assertEqual(other_thread_events, [{}])
+        self.assertEqual(len(self.events), 1)
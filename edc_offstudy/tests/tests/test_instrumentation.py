@@ -0,0 +1,109 @@
+import socket
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.test import TestCase, override_settings
+
+from edc_offstudy.instrumentation import (
+    MemorySink,
+    OffstudyMetric,
+    StatsdSink,
+    get_instrumentation_sink,
+    instrument,
+)
+from edc_offstudy.request_cache import offstudy_cache
+from edc_offstudy.utils import OffstudyError
+
+from ..forms import NonCrfOneForm
+from ..helper import OffstudyTestCaseMixin
+from ..models import NonCrfOne
+
+
+@override_settings(EDC_OFFSTUDY_INSTRUMENTATION_SINK="edc_offstudy.instrumentation.MemorySink")
+class TestInstrumentation(OffstudyTestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+        self.sink = get_instrumentation_sink()
+        self.sink.clear()
+
+    def test_save(self):
+        NonCrfOne.objects.create(
+            subject_identifier=self.subject_identifier,
+            report_datetime=self.offstudy_datetime,
+        )
+        summary = self.sink.summary()
+        check = summary[("raise_if_offstudy", "edc_offstudy.noncrfone")]
+        self.assertEqual(check["calls"], 1)
+        self.assertEqual(check["queries"], 1)
+        save = summary[("save", "edc_offstudy.noncrfone")]
+        self.assertEqual(save["calls"], 1)
+        self.assertGreater(save["queries"], check["queries"])
+        self.assertGreaterEqual(save["duration"], check["duration"])
+        self.assertEqual(save["errors"], 0)
+
+    def test_save_error(self):
+        with self.assertRaises(OffstudyError):
+            NonCrfOne.objects.create(
+                subject_identifier=self.subject_identifier,
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+            )
+        summary = self.sink.summary()
+        self.assertEqual(summary[("save", "edc_offstudy.noncrfone")]["errors"], 1)
+        self.assertEqual(summary[("raise_if_offstudy", "edc_offstudy.noncrfone")]["errors"], 1)
+
+    def test_cache_hits(self):
+        with offstudy_cache():
+            for _ in range(0, 3):
+                NonCrfOne.objects.create(
+                    subject_identifier=self.subject_identifier,
+                    report_datetime=self.offstudy_datetime,
+                )
+        check = self.sink.summary()[("raise_if_offstudy", "edc_offstudy.noncrfone")]
+        self.assertEqual(check["calls"], 3)
+        self.assertEqual(check["queries"], 1)
+        self.assertEqual(check["cache_hits"], 2)
+
+    def test_form_clean(self):
+        form = NonCrfOneForm(
+            data=dict(
+                subject_identifier=self.subject_identifier,
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+                site=Site.objects.get(id=settings.SITE_ID).id,
+            )
+        )
+        self.assertFalse(form.is_valid())
+        clean = self.sink.summary()[("clean", "edc_offstudy.noncrfone")]
+        self.assertEqual(clean["calls"], 1)
+        self.assertEqual(clean["errors"], 1)
+
+    def test_off(self):
+        with override_settings(EDC_OFFSTUDY_INSTRUMENTATION_SINK=None):
+            self.assertIsNone(get_instrumentation_sink())
+            self.assertIs(instrument("save"), instrument("clean"))
+            NonCrfOne.objects.create(
+                subject_identifier=self.subject_identifier,
+                report_datetime=self.offstudy_datetime,
+            )
+        self.assertEqual(self.sink.metrics, [])
+        self.assertIsInstance(get_instrumentation_sink(), MemorySink)
+
+    def test_statsd_sink(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(server.close)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(5)
+        sink = StatsdSink(port=server.getsockname()[1])
+        sink.record(OffstudyMetric("save", "edc_offstudy.crfone", 0.0015, 2, 1, True))
+        self.assertEqual(
+            server.recv(1024).decode().split("\n"),
+            [
+                "edc_offstudy.save.edc_offstudy_crfone.calls:1|c",
+                "edc_offstudy.save.edc_offstudy_crfone.time:1.500|ms",
+                "edc_offstudy.save.edc_offstudy_crfone.queries:2|c",
+                "edc_offstudy.save.edc_offstudy_crfone.cache_hits:1|c",
+                "edc_offstudy.save.edc_offstudy_crfone.errors:1|c",
+            ],
+        )
@@ -0,0 +1,142 @@
+import uuid
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase
+from edc_appointment.models import Appointment
+from edc_visit_tracking.constants import SCHEDULED
+from edc_visit_tracking.models import SubjectVisit
+
+from edc_offstudy.exceptions import OffstudyBatchError, OffstudyError
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import CrfOne, NonCrfOne
+
+
+class TestManagers(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        for subject_identifier in self.subject_identifiers[:2]:
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+
+    def get_objs(self, days: int) -> list[NonCrfOne]:
+        return [
+            NonCrfOne(
+                id=uuid.uuid4(),
+                subject_identifier=subject_identifier,
+                report_datetime=self.offstudy_datetime + relativedelta(days=days),
+            )
+            for subject_identifier in self.subject_identifiers
+        ]
+
+    def get_crf_objs(self, days: int) -> list[CrfOne]:
+        objs = []
+        for subject_identifier in self.subject_identifiers:
+            appointment = Appointment.objects.filter(
+                subject_identifier=subject_identifier
+            ).order_by("appt_datetime")[0]
+            subject_visit = SubjectVisit.objects.create(
+                appointment=appointment,
+                visit_schedule_name=appointment.visit_schedule_name,
+                schedule_name=appointment.schedule_name,
+                visit_code=appointment.visit_code,
+                report_datetime=appointment.appt_datetime,
+                reason=SCHEDULED,
+            )
+            objs.append(
+                CrfOne(
+                    id=uuid.uuid4(),
+                    subject_visit_id=subject_visit.id,
+                    report_datetime=self.offstudy_datetime + relativedelta(days=days),
+                )
+            )
+        return objs
+
+    def test_bulk_create_ok(self):
+        # one lookup, one insert
+        with self.assertNumQueries(2):
+            NonCrfOne.objects.bulk_create(self.get_objs(days=0))
+        self.assertEqual(NonCrfOne.objects.count(), 3)
+
+    def test_bulk_create_raises_for_all_offending(self):
+        objs = self.get_objs(days=1)
+        with self.assertRaises(OffstudyBatchError) as cm:
+            NonCrfOne.objects.bulk_create(objs)
+        self.assertIsInstance(cm.exception, OffstudyError)
+        self.assertEqual(cm.exception.objs, objs[:2])
+        self.assertEqual(
+            [(e.subject_identifier, e.offstudy_datetime) for e in cm.exception.errors],
+            [("111111111", self.offstudy_datetime), ("222222222", self.offstudy_datetime)],
+        )
+        self.assertIn("111111111", str(cm.exception))
+        self.assertIn("222222222", str(cm.exception))
+        self.assertEqual(NonCrfOne.objects.count(), 0)
+
+    def test_bulk_update(self):
+        objs = NonCrfOne.objects.bulk_create(self.get_objs(days=0))
+        for obj in objs:
+            obj.report_datetime = obj.report_datetime + relativedelta(days=1)
+        with self.assertRaises(OffstudyBatchError) as cm:
+            NonCrfOne.objects.bulk_update(objs, ["report_datetime"])
+        self.assertEqual(len(cm.exception.objs), 2)
+        NonCrfOne.objects.bulk_update(objs[2:], ["report_datetime"])
+
+    def test_crf_bulk_create(self):
+        objs = self.get_crf_objs(days=0)
+        # one visit lookup, one off-study lookup, one insert
+        with self.assertNumQueries(3):
+            CrfOne.objects.bulk_create(objs)
+        self.assertEqual(CrfOne.objects.count(), 3)
+
+    def test_crf_bulk_create_raises_for_all_offending(self):
+        objs = self.get_crf_objs(days=1)
+        with self.assertNumQueries(2), self.assertRaises(OffstudyBatchError) as cm:
+            CrfOne.objects.bulk_create(objs)
+        self.assertEqual(cm.exception.objs, objs[:2])
+        self.assertEqual(CrfOne.objects.count(), 0)
+
+    def test_crf_bulk_update(self):
+        objs = CrfOne.objects.bulk_create(self.get_crf_objs(days=0))
+        objs = list(CrfOne.objects.filter(pk__in=[obj.pk for obj in objs]))
+        for obj in objs:
+            obj.report_datetime = obj.report_datetime + relativedelta(days=1)
+        with self.assertNumQueries(2), self.assertRaises(OffstudyBatchError) as cm:
+            CrfOne.objects.bulk_update(objs, ["report_datetime"])
+        self.assertEqual(
+            sorted(obj.subject_visit.subject_identifier for obj in cm.exception.objs),
+            ["111111111", "222222222"],
+        )
+
+    def test_annotate_offstudy(self):
+        NonCrfOne.objects.bulk_create(self.get_objs(days=0))
+        NonCrfOne.objects.bulk_create(self.get_objs(days=1)[2:])
+        with self.assertNumQueries(1):
+            rows = list(
+                NonCrfOne.objects.annotate_offstudy()
+                .order_by("subject_identifier", "report_datetime")
+                .values_list("subject_identifier", "offstudy_datetime", "is_after_offstudy")
+            )
+        self.assertEqual(
+            rows,
+            [
+                ("111111111", self.offstudy_datetime, False),
+                ("222222222", self.offstudy_datetime, False),
+                ("333333333", None, False),
+                ("333333333", None, False),
+            ],
+        )
+
+    def test_annotate_offstudy_after(self):
+        NonCrfOne.objects.bulk_create(self.get_objs(days=0))
+        NonCrfOne.objects.update(
+            report_datetime=self.offstudy_datetime + relativedelta(days=1)
+        )
+        self.assertEqual(
+            sorted(
+                NonCrfOne.objects.annotate_offstudy()
+                .filter(is_after_offstudy=True)
+                .values_list("subject_identifier", flat=True)
+            ),
+            ["111111111", "222222222"],
+        )
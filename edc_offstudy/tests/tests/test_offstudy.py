@@ -1,3 +1,6 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.sites.models import Site
@@ -32,6 +35,7 @@ class TestOffstudy(TestCase):
         super().setUpClass()
         site_visit_schedules._registry = {}
         site_visit_schedules.register(visit_schedule1)
+        site_action_items.registry = {}
         site_action_items.register(EndOfStudyAction)
 
     def setUp(self):
@@ -93,6 +97,16 @@ class TestOffstudy(TestCase):
 
         self.assertTrue(str(obj))
 
+    def test_offstudy_str_refreshed_on_setting_changed(self):
+        obj = SubjectOffstudy(
+            subject_identifier=self.subject_identifier,
+            report_datetime=datetime(2024, 1, 1, 12, 30, tzinfo=ZoneInfo("UTC")),
+        )
+        with override_settings(TIME_ZONE="UTC", SHORT_DATETIME_FORMAT="Y-m-d H:i"):
+            self.assertEqual(str(obj), f"{self.subject_identifier} 2024-01-01 12:30")
+            with override_settings(TIME_ZONE="Africa/Dar_es_Salaam"):
+                self.assertEqual(str(obj), f"{self.subject_identifier} 2024-01-01 15:30")
+
     def test_offstudy_cls_raises_before_offstudy_date(self):
         OffScheduleOne.objects.create(
             subject_identifier=self.subject_identifier,
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.models import OffstudyStatus, SubjectOffstudy
+from edc_offstudy.offstudy_status import rebuild_offstudy_status
+from edc_offstudy.utils import (
+    get_offstudy_lookup_model_cls,
+    offstudy_status_populated,
+    raise_if_offstudy,
+)
+
+from ..helper import OffstudyTestCaseMixin
+
+
+class TestOffstudyStatus(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def test_not_synced_unless_enabled(self):
+        obj = self.helper.take_off_study("111111111", self.offstudy_datetime)
+        self.assertFalse(OffstudyStatus.objects.exists())
+        obj.delete()
+
+    @override_settings(EDC_OFFSTUDY_USE_STATUS_MODEL=True)
+    def test_synced_on_save_and_delete(self):
+        obj = self.helper.take_off_study("111111111", self.offstudy_datetime)
+        self.assertEqual(
+            OffstudyStatus.objects.get(subject_identifier="111111111").offstudy_datetime,
+            self.offstudy_datetime,
+        )
+        obj.offstudy_datetime = self.offstudy_datetime + relativedelta(days=1)
+        obj.save()
+        self.assertEqual(
+            OffstudyStatus.objects.get(subject_identifier="111111111").offstudy_datetime,
+            self.offstudy_datetime + relativedelta(days=1),
+        )
+        obj.delete()
+        self.assertFalse(OffstudyStatus.objects.filter(subject_identifier="111111111"))
+
+    def test_lookup_model(self):
+        self.assertEqual(get_offstudy_lookup_model_cls(), SubjectOffstudy)
+        with override_settings(EDC_OFFSTUDY_USE_STATUS_MODEL=True):
+            # not populated
+            self.assertEqual(get_offstudy_lookup_model_cls(), SubjectOffstudy)
+            rebuild_offstudy_status()
+            self.assertEqual(get_offstudy_lookup_model_cls(), OffstudyStatus)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_offstudy_lookup_model_cls(), OffstudyStatus)
+
+    def test_enabled_before_rebuild_reads_offstudy_model(self):
+        self.helper.take_off_study("111111111", self.offstudy_datetime)
+        with override_settings(EDC_OFFSTUDY_USE_STATUS_MODEL=True):
+            self.assertRaises(
+                OffstudyError,
+                raise_if_offstudy,
+                subject_identifier="111111111",
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+            )
+
+    def test_change_while_disabled_unsets_populated(self):
+        rebuild_offstudy_status()
+        self.assertTrue(offstudy_status_populated())
+        # not synced while disabled
+        self.helper.take_off_study("111111111", self.offstudy_datetime)
+        with override_settings(EDC_OFFSTUDY_USE_STATUS_MODEL=True):
+            self.assertFalse(offstudy_status_populated())
+            self.assertEqual(get_offstudy_lookup_model_cls(), SubjectOffstudy)
+            rebuild_offstudy_status()
+            self.assertEqual(get_offstudy_lookup_model_cls(), OffstudyStatus)
+
+    @override_settings(EDC_OFFSTUDY_USE_STATUS_MODEL=True)
+    def test_raise_if_offstudy_reads_status_model(self):
+        rebuild_offstudy_status()
+        self.helper.take_off_study("111111111", self.offstudy_datetime)
+        self.assertRaises(
+            OffstudyError,
+            raise_if_offstudy,
+            subject_identifier="111111111",
+            report_datetime=self.offstudy_datetime + relativedelta(days=1),
+        )
+        OffstudyStatus.objects.all().delete()
+        try:
+            raise_if_offstudy(
+                subject_identifier="111111111",
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+            )
+        except OffstudyError:
+            self.fail("OffstudyError unexpectedly raised.")
+
+    def test_rebuild(self):
+        for subject_identifier in self.subject_identifiers[:2]:
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+        OffstudyStatus.objects.all().delete()
+        OffstudyStatus.objects.create(
+            subject_identifier="333333333", offstudy_datetime=self.offstudy_datetime
+        )
+        self.assertEqual(rebuild_offstudy_status(batch_size=1), 2)
+        self.assertEqual(
+            list(
+                OffstudyStatus.objects.order_by("subject_identifier").values_list(
+                    "subject_identifier", "offstudy_datetime"
+                )
+            ),
+            [
+                ("111111111", self.offstudy_datetime),
+                ("222222222", self.offstudy_datetime),
+            ],
+        )
+        OffstudyStatus.objects.all().delete()
+        call_command("rebuild_offstudy_status", stdout=StringIO())
+        self.assertEqual(OffstudyStatus.objects.count(), 2)
@@ -0,0 +1,184 @@
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from edc_appointment.models import Appointment
+from edc_visit_tracking.constants import SCHEDULED
+from edc_visit_tracking.models import SubjectVisit
+
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.offstudy_subjects import (
+    OffstudySubjects,
+    get_offstudy_version,
+    increment_offstudy_version,
+    may_be_offstudy,
+    offstudy_subjects,
+)
+
+from ..forms import CrfOneForm, NonCrfOneForm
+from ..helper import OffstudyTestCaseMixin
+
+
+@override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=True, EDC_OFFSTUDY_SUBJECTS_TTL=0)
+class TestOffstudySubjects(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222"]
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.helper.take_off_study("111111111", self.offstudy_datetime)
+        offstudy_subjects.clear()
+
+    def take_off_study(self, subject_identifier):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+
+    def test_may_be_offstudy(self):
+        # version and subjects
+        with self.assertNumQueries(2):
+            self.assertTrue(may_be_offstudy("111111111"))
+        # version only
+        with self.assertNumQueries(1):
+            self.assertFalse(may_be_offstudy("222222222"))
+
+    @override_settings(EDC_OFFSTUDY_SUBJECTS_TTL=60)
+    def test_version_read_once_per_ttl(self):
+        # version and subjects
+        with self.assertNumQueries(2):
+            self.assertFalse(may_be_offstudy("222222222"))
+        with self.assertNumQueries(0):
+            self.assertFalse(may_be_offstudy("222222222"))
+            self.assertTrue(may_be_offstudy("111111111"))
+        # updated in this process without reading the version
+        self.take_off_study("222222222")
+        with self.assertNumQueries(0):
+            self.assertTrue(may_be_offstudy("222222222"))
+
+    def test_version_read_after_ttl(self):
+        other = OffstudySubjects(ttl=60)
+        self.assertNotIn("222222222", other)
+        self.take_off_study("222222222")
+        # within the TTL a change by another process is not seen
+        with self.assertNumQueries(0):
+            self.assertNotIn("222222222", other)
+        other.ttl = 0
+        with self.assertNumQueries(2):
+            self.assertIn("222222222", other)
+
+    def test_disabled(self):
+        with override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=False):
+            with self.assertNumQueries(0):
+                self.assertTrue(may_be_offstudy("222222222"))
+
+    def test_updated_by_signal(self):
+        self.assertFalse(may_be_offstudy("222222222"))
+        version = get_offstudy_version()
+        self.take_off_study("222222222")
+        self.assertGreater(get_offstudy_version(), version)
+        self.assertTrue(may_be_offstudy("222222222"))
+
+    def test_version_incremented_on_commit(self):
+        version = get_offstudy_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.helper.take_off_study("222222222", self.offstudy_datetime)
+        self.assertEqual(get_offstudy_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_offstudy_version(), version)
+
+    def test_change_by_other_process(self):
+        other = OffstudySubjects()
+        self.assertNotIn("222222222", other)
+        self.take_off_study("222222222")
+        # version changed, rebuilds
+        with self.assertNumQueries(2):
+            self.assertIn("222222222", other)
+        # version not changed
+        with self.assertNumQueries(1):
+            self.assertIn("222222222", other)
+
+    def test_form_skips_offstudy_query(self):
+        def get_form(subject_identifier, days=0):
+            return NonCrfOneForm(
+                data=dict(
+                    subject_identifier=subject_identifier,
+                    report_datetime=self.offstudy_datetime + relativedelta(days=days),
+                    site=Site.objects.get(id=settings.SITE_ID).id,
+                )
+            )
+
+        may_be_offstudy("222222222")
+        with CaptureQueriesContext(connection) as enabled:
+            self.assertTrue(get_form("222222222").is_valid())
+        with override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=False):
+            with CaptureQueriesContext(connection) as disabled:
+                self.assertTrue(get_form("222222222").is_valid())
+        offstudy_table = SubjectOffstudy._meta.db_table
+        self.assertFalse([q for q in enabled if offstudy_table in q["sql"]])
+        self.assertTrue([q for q in disabled if offstudy_table in q["sql"]])
+        form = get_form("111111111", days=1)
+        self.assertFalse(form.is_valid())
+        self.assertIn("Subject off study", str(form.errors))
+
+    def test_form_sees_change_by_other_process(self):
+        self.assertFalse(may_be_offstudy("222222222"))
+        # as another process would, not updating the set in this one
+        with override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=False):
+            self.take_off_study("222222222")
+        increment_offstudy_version()
+        form = NonCrfOneForm(
+            data=dict(
+                subject_identifier="222222222",
+                report_datetime=self.offstudy_datetime + relativedelta(days=1),
+                site=Site.objects.get(id=settings.SITE_ID).id,
+            )
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("Subject off study", str(form.errors))
+
+    @override_settings(EDC_OFFSTUDY_SUBJECTS_TTL=60)
+    def test_non_crf_form_clean_fewer_queries(self):
+        data = dict(
+            subject_identifier="222222222",
+            report_datetime=self.offstudy_datetime,
+            site=Site.objects.get(id=settings.SITE_ID).id,
+        )
+        with override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=False):
+            with CaptureQueriesContext(connection) as disabled:
+                self.assertTrue(NonCrfOneForm(data=data).is_valid())
+        may_be_offstudy("222222222")
+        with self.assertNumQueries(len(disabled) - 1):
+            self.assertTrue(NonCrfOneForm(data=data).is_valid())
+
+    @override_settings(EDC_OFFSTUDY_SUBJECTS_TTL=60)
+    def test_crf_form_clean_no_more_queries(self):
+        appointment = (
+            Appointment.objects.filter(subject_identifier="222222222")
+            .order_by("appt_datetime")
+            .first()
+        )
+        subject_visit = SubjectVisit.objects.create(
+            appointment=appointment,
+            visit_schedule_name=appointment.visit_schedule_name,
+            schedule_name=appointment.schedule_name,
+            visit_code=appointment.visit_code,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        data = dict(
+            subject_visit=subject_visit,
+            report_datetime=appointment.appt_datetime,
+            visit_schedule_name=appointment.visit_schedule_name,
+            schedule_name=appointment.schedule_name,
+            site=Site.objects.get(id=settings.SITE_ID).id,
+        )
+        with override_settings(EDC_OFFSTUDY_USE_SUBJECTS_SET=False):
+            with CaptureQueriesContext(connection) as disabled:
+                self.assertTrue(CrfOneForm(data=data).is_valid())
+        may_be_offstudy("222222222")
+        # the off-study and off-schedule join is replaced by an
+        # off-schedule select
+        with self.assertNumQueries(len(disabled)):
+            self.assertTrue(CrfOneForm(data=data).is_valid())
@@ -0,0 +1,112 @@
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.middleware import OffstudyCacheMiddleware
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.request_cache import get_offstudy_cache, offstudy_cache
+from edc_offstudy.utils import raise_if_offstudy
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import NonCrfOne
+
+
+class TestRequestCache(OffstudyTestCaseMixin, TestCase):
+    @staticmethod
+    def count_offstudy_selects(ctx: CaptureQueriesContext) -> int:
+        table = SubjectOffstudy._meta.db_table
+        return len(
+            [
+                q
+                for q in ctx.captured_queries
+                if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"]
+            ]
+        )
+
+    def test_no_cache_outside_of_context(self):
+        self.assertIsNone(get_offstudy_cache())
+        with offstudy_cache() as cache:
+            self.assertIs(get_offstudy_cache(), cache)
+            with offstudy_cache() as nested_cache:
+                self.assertIs(nested_cache, cache)
+        self.assertIsNone(get_offstudy_cache())
+
+    def test_repeated_checks_query_once(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with offstudy_cache():
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(0, 5):
+                    raise_if_offstudy(
+                        subject_identifier=self.subject_identifier,
+                        report_datetime=report_datetime,
+                    )
+        self.assertEqual(self.count_offstudy_selects(ctx), 1)
+
+    def test_repeated_saves_query_offstudy_once(self):
+        with offstudy_cache() as cache, CaptureQueriesContext(connection) as ctx:
+            for _ in range(0, 3):
+                NonCrfOne.objects.create(
+                    subject_identifier=self.subject_identifier,
+                    report_datetime=self.offstudy_datetime,
+                )
+            self.assertEqual(self.count_offstudy_selects(ctx), 1)
+            self.assertIn(self.subject_identifier, cache)
+            self.assertIsNone(cache.get(self.subject_identifier))
+
+    def test_invalidated_on_offstudy_save_and_delete(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with offstudy_cache():
+            raise_if_offstudy(
+                subject_identifier=self.subject_identifier, report_datetime=report_datetime
+            )
+            self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+            self.assertRaises(
+                OffstudyError,
+                raise_if_offstudy,
+                subject_identifier=self.subject_identifier,
+                report_datetime=report_datetime,
+            )
+            SubjectOffstudy.objects.get(subject_identifier=self.subject_identifier).delete()
+            try:
+                raise_if_offstudy(
+                    subject_identifier=self.subject_identifier,
+                    report_datetime=report_datetime,
+                )
+            except OffstudyError:
+                self.fail("OffstudyError unexpectedly raised.")
+
+    def test_not_cached_if_rolled_back(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with offstudy_cache() as cache:
+            try:
+                with transaction.atomic():
+                    self.helper.take_off_study(self.subject_identifier, self.offstudy_datetime)
+                    self.assertRaises(
+                        OffstudyError,
+                        raise_if_offstudy,
+                        subject_identifier=self.subject_identifier,
+                        report_datetime=report_datetime,
+                    )
+                    self.assertNotIn(self.subject_identifier, cache)
+                    raise ValueError("rollback")
+            except ValueError:
+                pass
+            try:
+                raise_if_offstudy(
+                    subject_identifier=self.subject_identifier,
+                    report_datetime=report_datetime,
+                )
+            except OffstudyError:
+                self.fail("OffstudyError unexpectedly raised.")
+
+    def test_middleware(self):
+        def get_response(request):
+            self.assertIsNotNone(get_offstudy_cache())
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        OffstudyCacheMiddleware(get_response)(request)
+        self.assertIsNone(get_offstudy_cache())
@@ -0,0 +1,117 @@
+from dateutil.relativedelta import relativedelta
+from django.core.cache import caches
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.shared_cache import (
+    get_shared_offstudy_cache,
+    get_uncommitted_subject_identifiers,
+)
+from edc_offstudy.utils import (
+    get_offstudy_and_offschedule_datetimes,
+    get_offstudy_datetime,
+)
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import OffScheduleOne
+
+SHARED_CACHE_SETTINGS = dict(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "offstudy": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "offstudy",
+        },
+    },
+    EDC_OFFSTUDY_SHARED_CACHE="offstudy",
+)
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+class TestSharedCache(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222"]
+
+    def setUp(self):
+        # the database is rolled back after each test, the cache is not
+        caches["offstudy"].clear()
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.helper.take_off_study("111111111", self.offstudy_datetime)
+
+    def test_key(self):
+        self.assertEqual(
+            get_shared_offstudy_cache().get_key("111111111"),
+            "edc_offstudy:edc_offstudy.subjectoffstudy:111111111",
+        )
+
+    def test_get_offstudy_datetime(self):
+        caches["offstudy"].clear()
+        for subject_identifier, offstudy_datetime in [
+            ("111111111", self.offstudy_datetime),
+            ("222222222", None),
+        ]:
+            with self.assertNumQueries(1):
+                self.assertEqual(get_offstudy_datetime(subject_identifier), offstudy_datetime)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_offstudy_datetime(subject_identifier), offstudy_datetime)
+            self.assertEqual(
+                get_shared_offstudy_cache().get(subject_identifier),
+                (True, offstudy_datetime),
+            )
+
+    def test_get_offstudy_and_offschedule_datetimes(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        get_offstudy_datetime("111111111")
+        # offschedule only
+        with self.assertNumQueries(1):
+            datetimes = get_offstudy_and_offschedule_datetimes(
+                "111111111", report_datetime, OffScheduleOne
+            )
+        self.assertEqual(datetimes, (self.offstudy_datetime, self.offstudy_datetime))
+
+    def test_write_through(self):
+        shared_cache = get_shared_offstudy_cache()
+        self.assertIsNone(get_offstudy_datetime("222222222"))
+        self.assertEqual(shared_cache.get("222222222"), (True, None))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.helper.take_off_study("222222222", self.offstudy_datetime)
+            # removed now, not filled until committed
+            self.assertEqual(shared_cache.get("222222222"), (False, None))
+            self.assertEqual(get_offstudy_datetime("222222222"), self.offstudy_datetime)
+            self.assertEqual(shared_cache.get("222222222"), (False, None))
+        self.assertEqual(shared_cache.get("222222222"), (True, self.offstudy_datetime))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_offstudy_datetime("222222222"), self.offstudy_datetime)
+
+    def test_write_through_on_delete(self):
+        shared_cache = get_shared_offstudy_cache()
+        get_offstudy_datetime("111111111")
+        with self.captureOnCommitCallbacks(execute=True):
+            SubjectOffstudy.objects.get(subject_identifier="111111111").delete()
+        self.assertEqual(shared_cache.get("111111111"), (True, None))
+
+    def test_disabled(self):
+        with override_settings(EDC_OFFSTUDY_SHARED_CACHE=None):
+            self.assertIsNone(get_shared_offstudy_cache())
+            get_offstudy_datetime("111111111")
+            with self.assertNumQueries(1):
+                get_offstudy_datetime("111111111")
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+class TestSharedCacheTransaction(OffstudyTestCaseMixin, TransactionTestCase):
+    def setUp(self):
+        caches["offstudy"].clear()
+        super().setUp()
+
+    def test_rolled_back_subject_cached(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.helper.take_off_study("111111111", self.offstudy_datetime)
+                self.assertEqual(get_uncommitted_subject_identifiers(), {"111111111"})
+                raise RuntimeError()
+        with transaction.atomic():
+            self.assertEqual(get_uncommitted_subject_identifiers(), set())
+        self.assertIsNone(get_offstudy_datetime("111111111"))
+        self.assertEqual(get_shared_offstudy_cache().get("111111111"), (True, None))
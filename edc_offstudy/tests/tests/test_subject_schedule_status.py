@@ -0,0 +1,122 @@
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.test import TestCase
+from edc_constants.constants import DEAD
+from edc_visit_schedule.exceptions import OffScheduleError
+
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.subject_schedule_status import SubjectScheduleStatus
+
+from ..forms import SubjectOffstudyForm
+from ..helper import OffstudyTestCaseMixin
+from ..models import OffScheduleOne
+
+
+class TestSubjectScheduleStatus(OffstudyTestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.offschedule_datetime = self.offstudy_datetime
+
+    def take_off_schedule(self):
+        OffScheduleOne.objects.create(
+            subject_identifier=self.subject_identifier,
+            report_datetime=self.offschedule_datetime,
+            offschedule_datetime=self.offschedule_datetime,
+        )
+
+    def test_on_schedule_raises(self):
+        subject_schedule_status = SubjectScheduleStatus(self.subject_identifier)
+        with self.assertNumQueries(2):
+            self.assertRaises(
+                OffScheduleError, subject_schedule_status.off_all_schedules_or_raise
+            )
+        with self.assertNumQueries(0):
+            subject_schedule_status.offstudy_datetime_after_all_offschedule_datetimes(
+                offstudy_datetime=self.offschedule_datetime
+            )
+
+    def test_offstudy_datetime_before_offschedule_datetime_raises(self):
+        self.take_off_schedule()
+        subject_schedule_status = SubjectScheduleStatus(self.subject_identifier)
+        subject_schedule_status.off_all_schedules_or_raise()
+        with self.assertNumQueries(0):
+            self.assertRaises(
+                OffstudyError,
+                subject_schedule_status.offstudy_datetime_after_all_offschedule_datetimes,
+                offstudy_datetime=self.offschedule_datetime - relativedelta(days=1),
+                exception_cls=OffstudyError,
+            )
+            subject_schedule_status.offstudy_datetime_after_all_offschedule_datetimes(
+                offstudy_datetime=self.offschedule_datetime
+            )
+
+    def test_not_on_any_schedule(self):
+        subject_schedule_status = SubjectScheduleStatus("222222222")
+        with self.assertNumQueries(1):
+            subject_schedule_status.off_all_schedules_or_raise()
+
+    def test_form_passes_status_to_save(self):
+        self.take_off_schedule()
+        form = SubjectOffstudyForm(
+            data=dict(
+                subject_identifier=self.subject_identifier,
+                offstudy_datetime=self.offschedule_datetime,
+                offstudy_reason=DEAD,
+                site=settings.SITE_ID,
+            )
+        )
+        self.assertTrue(form.is_valid())
+        self.assertIs(
+            form.instance.get_subject_schedule_status(), form.subject_schedule_status
+        )
+        form.save()
+        self.assertIsNone(form.instance.subject_schedule_status)
+
+    def test_status_for_other_subject_not_used(self):
+        obj = SubjectOffstudy(subject_identifier=self.subject_identifier)
+        obj.subject_schedule_status = SubjectScheduleStatus("222222222")
+        self.assertEqual(
+            obj.get_subject_schedule_status().subject_identifier, self.subject_identifier
+        )
+        obj.offstudy_datetime = self.offschedule_datetime
+        self.assertRaises(OffScheduleError, obj.save)
+
+    def test_status_reset_if_save_raises(self):
+        obj = SubjectOffstudy(
+            subject_identifier=self.subject_identifier,
+            offstudy_datetime=self.offschedule_datetime,
+        )
+        obj.subject_schedule_status = SubjectScheduleStatus(self.subject_identifier)
+        self.assertRaises(OffScheduleError, obj.save)
+        self.assertIsNone(obj.subject_schedule_status)
+
+    def test_form_raises_validation_error(self):
+        form = SubjectOffstudyForm(
+            data=dict(
+                subject_identifier=self.subject_identifier,
+                offstudy_datetime=self.offschedule_datetime,
+                offstudy_reason=DEAD,
+                site=settings.SITE_ID,
+            )
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("Subject is still on a schedule", str(form.errors))
+
+    def test_for_subjects(self):
+        self.helper.consent_and_put_on_schedule("222222222")
+        self.take_off_schedule()
+        with self.assertNumQueries(2):
+            statuses = SubjectScheduleStatus.for_subjects(
+                [self.subject_identifier, "222222222", "333333333"]
+            )
+        with self.assertNumQueries(0):
+            statuses[self.subject_identifier].off_all_schedules_or_raise()
+            self.assertRaises(
+                OffScheduleError, statuses["222222222"].off_all_schedules_or_raise
+            )
+            statuses["333333333"].off_all_schedules_or_raise()
+        self.assertEqual(
+            statuses[self.subject_identifier].offschedule_datetimes,
+            SubjectScheduleStatus(self.subject_identifier).offschedule_datetimes,
+        )
@@ -0,0 +1,50 @@
+from django.template import Context, Template
+from django.test import TestCase
+
+from edc_offstudy.utils import get_offstudy_objs
+
+from ..helper import OffstudyTestCaseMixin
+from ..visit_schedule import visit_schedule1
+
+
+class TestTemplatetags(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333"]
+
+    def setUp(self):
+        super().setUp()
+        for subject_identifier in self.subject_identifiers[:2]:
+            self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+        self.template = Template(
+            "{% load edc_offstudy_extras %}"
+            "{% for subject_identifier in subject_identifiers %}"
+            "{% offstudy_visit_schedule_row subject_identifier visit_schedule '/dashboard/' %}"
+            "{% endfor %}"
+        )
+
+    def render(self, **kwargs) -> str:
+        return self.template.render(
+            Context(
+                dict(
+                    subject_identifiers=self.subject_identifiers,
+                    visit_schedule=visit_schedule1,
+                    **kwargs,
+                )
+            )
+        )
+
+    def test_get_offstudy_objs(self):
+        with self.assertNumQueries(1):
+            offstudy_objs = get_offstudy_objs(self.subject_identifiers)
+        self.assertEqual(list(offstudy_objs), ["111111111", "222222222"])
+        self.assertEqual(
+            list(get_offstudy_objs(self.subject_identifiers, chunk_size=1)),
+            ["111111111", "222222222"],
+        )
+
+    def test_row_uses_offstudy_objs_from_context(self):
+        with self.assertNumQueries(3):
+            expected = self.render()
+        self.assertEqual(expected.count("Subject was taken off"), 2)
+        offstudy_objs = get_offstudy_objs(self.subject_identifiers)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(offstudy_objs=offstudy_objs), expected)
@@ -0,0 +1,164 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from edc_visit_schedule.visit_schedule import VisitSchedule
+
+from edc_offstudy.exceptions import OffstudyError
+from edc_offstudy.models import SubjectOffstudy
+from edc_offstudy.request_cache import offstudy_cache
+from edc_offstudy.utils import (
+    find_offstudy_violations,
+    get_offstudy_and_offschedule_datetimes,
+    get_offstudy_datetimes,
+    get_offstudy_model_cls,
+    raise_if_offstudy,
+)
+
+from ..helper import OffstudyTestCaseMixin
+from ..models import NonCrfOne, OffScheduleOne, SubjectOffstudy2
+from ..visit_schedule import schedule1, visit_schedule1
+
+
+class TestUtils(OffstudyTestCaseMixin, TestCase):
+    subject_identifiers = ["111111111", "222222222", "333333333", "444444444"]
+
+    def setUp(self):
+        super().setUp()
+        self.consent_datetime = self.helper.consent_datetime
+        with self.captureOnCommitCallbacks(execute=True):
+            for subject_identifier in self.subject_identifiers[:2]:
+                self.helper.take_off_study(subject_identifier, self.offstudy_datetime)
+
+    def test_get_offstudy_datetimes(self):
+        self.assertEqual(
+            get_offstudy_datetimes(self.subject_identifiers),
+            {
+                "111111111": self.offstudy_datetime,
+                "222222222": self.offstudy_datetime,
+            },
+        )
+
+    def test_get_offstudy_datetimes_chunked(self):
+        with self.assertNumQueries(2):
+            offstudy_datetimes = get_offstudy_datetimes(self.subject_identifiers, chunk_size=2)
+        self.assertEqual(list(offstudy_datetimes), ["111111111", "222222222"])
+
+    def test_find_offstudy_violations_matches_raise_if_offstudy(self):
+        rows = []
+        for subject_identifier in self.subject_identifiers:
+            for days in [-1, 0, 1]:
+                report_datetime = self.offstudy_datetime + relativedelta(days=days)
+                rows.append((subject_identifier, report_datetime))
+        expected = []
+        for subject_identifier, report_datetime in rows:
+            try:
+                raise_if_offstudy(
+                    subject_identifier=subject_identifier, report_datetime=report_datetime
+                )
+            except OffstudyError:
+                expected.append((subject_identifier, report_datetime))
+        with self.assertNumQueries(1):
+            violations = find_offstudy_violations(rows)
+        self.assertEqual(violations, expected)
+        self.assertEqual(len(violations), 2)
+
+    def test_find_offstudy_violations_returns_row_as_is(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        rows = [
+            ("111111111", report_datetime, 1),
+            ("333333333", report_datetime, 2),
+            (None, report_datetime, 3),
+        ]
+        self.assertEqual(find_offstudy_violations(rows), [("111111111", report_datetime, 1)])
+
+    def test_raise_if_offstudy_single_select(self):
+        """Assert one SELECT and no savepoint per check."""
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with self.assertNumQueries(1):
+            raise_if_offstudy(subject_identifier="333333333", report_datetime=report_datetime)
+        with self.assertNumQueries(1):
+            raise_if_offstudy(
+                subject_identifier="111111111", report_datetime=self.offstudy_datetime
+            )
+        with self.assertNumQueries(1):
+            self.assertRaises(
+                OffstudyError,
+                raise_if_offstudy,
+                subject_identifier="111111111",
+                report_datetime=report_datetime,
+            )
+
+    def test_offstudy_error_attributes(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with self.assertRaises(OffstudyError) as cm:
+            raise_if_offstudy(
+                source_obj=NonCrfOne(),
+                subject_identifier="111111111",
+                report_datetime=report_datetime,
+            )
+        e = cm.exception
+        self.assertEqual(e.subject_identifier, "111111111")
+        self.assertEqual(e.report_datetime, report_datetime)
+        self.assertEqual(e.offstudy_datetime, self.offstudy_datetime)
+        self.assertEqual(e.source_model, "edc_offstudy.noncrfone")
+        # message is rendered on first use
+        self.assertIsNone(e._message)
+        self.assertIn("Subject off study by given date/time", str(e))
+        self.assertIn("Source model `non crf one`", str(e))
+        self.assertIn(get_offstudy_model_cls()._meta.verbose_name, e.message)
+
+    def test_offstudy_error_message(self):
+        e = OffstudyError("Subject off study.")
+        self.assertEqual(str(e), "Subject off study.")
+        self.assertEqual(e.args, ("Subject off study.",))
+        self.assertIsNone(e.subject_identifier)
+
+    def test_get_offstudy_and_offschedule_datetimes(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with self.assertNumQueries(1):
+            datetimes = get_offstudy_and_offschedule_datetimes(
+                "111111111", report_datetime, OffScheduleOne
+            )
+        self.assertEqual(datetimes, (self.offstudy_datetime, self.offstudy_datetime))
+        with self.assertNumQueries(1):
+            datetimes = get_offstudy_and_offschedule_datetimes(
+                "111111111", self.offstudy_datetime, OffScheduleOne
+            )
+        self.assertEqual(datetimes, (self.offstudy_datetime, None))
+        with self.assertNumQueries(1):
+            datetimes = get_offstudy_and_offschedule_datetimes(
+                "333333333", report_datetime, OffScheduleOne
+            )
+        self.assertEqual(datetimes, (None, None))
+
+    def test_get_offstudy_and_offschedule_datetimes_cached(self):
+        report_datetime = self.offstudy_datetime + relativedelta(days=1)
+        with offstudy_cache():
+            get_offstudy_and_offschedule_datetimes(
+                "111111111", report_datetime, OffScheduleOne
+            )
+            with self.assertNumQueries(1):
+                datetimes = get_offstudy_and_offschedule_datetimes(
+                    "111111111", report_datetime, OffScheduleOne
+                )
+            self.assertEqual(datetimes, (self.offstudy_datetime, self.offstudy_datetime))
+            with self.assertNumQueries(0):
+                raise_if_offstudy(
+                    subject_identifier="111111111", report_datetime=self.offstudy_datetime
+                )
+
+    def test_get_offstudy_model_cls_resolved_per_registry(self):
+        self.assertEqual(get_offstudy_model_cls(), SubjectOffstudy)
+        visit_schedule2 = VisitSchedule(
+            name="visit_schedule2",
+            offstudy_model="edc_offstudy.subjectoffstudy2",
+            death_report_model="edc_adverse_event.deathreport",
+            locator_model="edc_locator.subjectlocator",
+        )
+        visit_schedule2.add_schedule(schedule1)
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule2)
+        self.assertEqual(get_offstudy_model_cls(), SubjectOffstudy2)
+        site_visit_schedules._registry.pop("visit_schedule2")
+        site_visit_schedules.register(visit_schedule1)
+        self.assertEqual(get_offstudy_model_cls(), SubjectOffstudy)
@@ -1,58 +1,719 @@
 from __future__ import annotations
 
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Type, TypeVar
 
 from django.apps import apps as django_apps
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from edc_utils import formatted_datetime, to_utc
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.backends.utils import truncate_name
+from django.db.models import CharField, OuterRef, Subquery, Value
+from edc_utils import to_utc
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
-from .exceptions import OffstudyError
+from .exceptions import OffstudyBatchError, OffstudyError
+from .instrumentation import instrument
+from .request_cache import OffstudyCache, get_offstudy_cache
 
 if TYPE_CHECKING:
-    from django.db.models import Model
+    from django.db.models import ForeignKey, Model, QuerySet
+    from django.db.transaction import Atomic
+    from edc_visit_schedule.model_mixins import OffScheduleModelMixin
 
     from .model_mixins import OffstudyModelMixin
+    from .models import OffstudyStatus
+
+OFFSCHEDULE = "offschedule"
+OFFSTUDY = "offstudy"
+OFFSTUDY_LOOKUP_CHUNK_SIZE = 500
+# the single OffstudyVersion row
+OFFSTUDY_VERSION_PK = 1
+# prefix of the exception raised by the off-study trigger, see db_triggers
+OFFSTUDY_TRIGGER_MESSAGE_PREFIX = "edc_offstudy: "
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=8)
+def _resolve_offstudy_model(
+    offstudy_models: tuple[str, ...],
+) -> tuple[str, Type[OffstudyModelMixin]]:
+    """Returns a tuple of (label_lower, model class) of the Offstudy
+    model for the `offstudy_model` of each registered visit schedule.
+
+    Cached on `offstudy_models` so re-registering or resetting
+    site_visit_schedules resolves again.
+    """
+    offstudy_model = site_visit_schedules.get_offstudy_model()
+    return offstudy_model, django_apps.get_model(offstudy_model)
+
+
+def _get_offstudy_model() -> tuple[str, Type[OffstudyModelMixin]]:
+    return _resolve_offstudy_model(
+        tuple(v.offstudy_model for v in site_visit_schedules.registry.values())
+    )
+
+
+def clear_offstudy_model_cache() -> None:
+    """Clears the resolved Offstudy model.
+
+    Not needed after registering or resetting site_visit_schedules.
+    """
+    _resolve_offstudy_model.cache_clear()
 
 
 def get_offstudy_model() -> str:
     """Returns the Offstudy model name in label_lower format"""
-    return site_visit_schedules.get_offstudy_model()
+    return _get_offstudy_model()[0]
 
 
-def get_offstudy_model_cls() -> OffstudyModelMixin:
+def get_offstudy_model_cls() -> Type[OffstudyModelMixin]:
     """Returns the Offstudy model class.
 
     Uses visit_schedule_name to get the class from the visit schedule
     otherwise defaults settings.EDC_OFFSTUDY_OFFSTUDY_MODEL.
+
+    The class is resolved once per set of registered visit
+    schedules, see `_resolve_offstudy_model`.
+    """
+    return _get_offstudy_model()[1]
+
+
+def get_offstudy_datetime(subject_identifier: str) -> datetime | None:
+    """Returns the subject's offstudy_datetime or None if the
+    subject is not off study.
+
+    Uses the active off-study cache and the shared off-study cache,
+    if any. See `offstudy_cache` and `shared_cache`.
+
+    Read-only, so does not open a savepoint (transaction.atomic).
+    """
+    found, offstudy_datetime = _get_cached_offstudy_datetime(subject_identifier)
+    if not found:
+        offstudy_datetime = next(iter(_get_offstudy_datetime_qs(subject_identifier)), None)
+        _set_cached_offstudy_datetime(subject_identifier, offstudy_datetime)
+    return offstudy_datetime
+
+
+async def aget_offstudy_datetime(subject_identifier: str) -> datetime | None:
+    """Async version of `get_offstudy_datetime`."""
+    found, offstudy_datetime = await _aget_cached_offstudy_datetime(subject_identifier)
+    if not found:
+        offstudy_datetime = next(
+            iter([dt async for dt in _get_offstudy_datetime_qs(subject_identifier)]), None
+        )
+        await _aset_cached_offstudy_datetime(subject_identifier, offstudy_datetime)
+    return offstudy_datetime
+
+
+def _get_offstudy_cache_for(subject_identifier: str) -> OffstudyCache | None:
+    """Returns the active off-study cache or None if there is none
+    or if the subject has an uncommitted off-study change.
+    """
+    if subject_identifier in get_uncommitted_subject_identifiers():
+        return None
+    return get_offstudy_cache()
+
+
+def _get_cached_offstudy_datetime(subject_identifier: str) -> tuple[bool, datetime | None]:
+    """Returns a tuple of (found, offstudy_datetime) from the active
+    off-study cache or the shared off-study cache.
+    """
+    # avoid a circular import
+    from .shared_cache import get_shared_offstudy_cache
+
+    cache = _get_offstudy_cache_for(subject_identifier)
+    if cache is not None and subject_identifier in cache:
+        return True, cache.get(subject_identifier)
+    if shared_cache := get_shared_offstudy_cache():
+        found, offstudy_datetime = shared_cache.get(subject_identifier)
+        if found and cache is not None:
+            cache.set(subject_identifier, offstudy_datetime)
+        return found, offstudy_datetime
+    return False, None
+
+
+async def _aget_cached_offstudy_datetime(
+    subject_identifier: str,
+) -> tuple[bool, datetime | None]:
+    from .shared_cache import get_shared_offstudy_cache
+
+    cache = _get_offstudy_cache_for(subject_identifier)
+    if cache is not None and subject_identifier in cache:
+        return True, cache.get(subject_identifier)
+    if shared_cache := get_shared_offstudy_cache():
+        found, offstudy_datetime = await shared_cache.aget(subject_identifier)
+        if found and cache is not None:
+            cache.set(subject_identifier, offstudy_datetime)
+        return found, offstudy_datetime
+    return False, None
+
+
+def _set_cached_offstudy_datetime(
+    subject_identifier: str, offstudy_datetime: datetime | None
+) -> None:
+    from .shared_cache import get_shared_offstudy_cache
+
+    if (cache := _get_offstudy_cache_for(subject_identifier)) is not None:
+        cache.set(subject_identifier, offstudy_datetime)
+    if shared_cache := get_shared_offstudy_cache():
+        shared_cache.add(subject_identifier, offstudy_datetime)
+
+
+async def _aset_cached_offstudy_datetime(
+    subject_identifier: str, offstudy_datetime: datetime | None
+) -> None:
+    from .shared_cache import get_shared_offstudy_cache
+
+    if (cache := _get_offstudy_cache_for(subject_identifier)) is not None:
+        cache.set(subject_identifier, offstudy_datetime)
+    if shared_cache := get_shared_offstudy_cache():
+        await shared_cache.aadd(subject_identifier, offstudy_datetime)
+
+
+def _get_offstudy_datetime_qs(subject_identifier: str) -> QuerySet:
+    """Returns a queryset of at most one offstudy_datetime.
+
+    Not ordered, unlike `first()`, so the lookup can be answered from
+    the covering index on the Offstudy model.
+    """
+    return (
+        get_offstudy_lookup_model_cls()
+        .objects.filter(subject_identifier=subject_identifier)
+        .order_by()
+        .values_list("offstudy_datetime", flat=True)[:1]
+    )
+
+
+def get_offstudy_lookup_model_cls() -> OffstudyModelMixin | OffstudyStatus:
+    """Returns the model class to read offstudy_datetime from.
+
+    Returns the OffstudyStatus model if
+    settings.EDC_OFFSTUDY_USE_STATUS_MODEL is True and
+    `rebuild_offstudy_status` has populated it, otherwise the
+    Offstudy model.
+    """
+    if getattr(settings, "EDC_OFFSTUDY_USE_STATUS_MODEL", False) and (
+        offstudy_status_populated()
+    ):
+        return django_apps.get_model("edc_offstudy.offstudystatus")
+    return get_offstudy_model_cls()
+
+
+_offstudy_status_populated = False
+
+
+def offstudy_status_populated() -> bool:
+    """Returns True if `rebuild_offstudy_status` has populated the
+    OffstudyStatus model.
+
+    Read from OffstudyVersion until True, then kept for the life of
+    the process. Cleared by the `setting_changed` signal, see signals.
+    """
+    global _offstudy_status_populated
+    if not _offstudy_status_populated:
+        _offstudy_status_populated = (
+            django_apps.get_model("edc_offstudy.offstudyversion")
+            .objects.filter(pk=OFFSTUDY_VERSION_PK, status_populated=True)
+            .exists()
+        )
+    return _offstudy_status_populated
+
+
+def clear_offstudy_status_populated() -> None:
+    global _offstudy_status_populated
+    _offstudy_status_populated = False
+
+
+def get_outermost_atomic_block(connection) -> Atomic | None:
+    """Returns the atomic block of the transaction on this connection
+    or None if in autocommit mode.
+
+    Usually the outermost block. The blocks a TestCase wraps around
+    each test are skipped, like Django does for durable blocks, so
+    the block is the one opened in the test or, if none, the test's.
+    """
+    atomic_blocks = connection.atomic_blocks
+    for atomic_block in atomic_blocks:
+        if not getattr(atomic_block, "_from_testcase", False):
+            return atomic_block
+    return atomic_blocks[-1] if atomic_blocks else None
+
+
+def get_uncommitted(using: str | None, name: str, default_factory: Callable[[], T]) -> T:
+    """Returns the state named `name` kept for changes waiting on
+    commit on this database connection, e.g. pending events.
+
+    Stored on the connection so it is not shared between threads and
+    tied to the transaction's outermost atomic block, so state left
+    over from a rolled back transaction is discarded when the next
+    transaction starts, e.g. with ATOMIC_REQUESTS and persistent
+    connections.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    attr = f"edc_offstudy_uncommitted_{name}"
+    atomic_block = get_outermost_atomic_block(connection)
+    atomic_block_for_state, state = getattr(connection, attr, (None, None))
+    if state is None or atomic_block is None or atomic_block is not atomic_block_for_state:
+        state = default_factory()
+        setattr(connection, attr, (atomic_block, state))
+    return state
+
+
+def get_uncommitted_subject_identifiers(using: str | None = None) -> set[str]:
+    """Returns the subjects with an off-study change waiting on
+    commit on this database connection.
+
+    Lookups do not cache a value for these subjects, so a value read
+    before a rollback is not returned after it.
+    """
+    return get_uncommitted(using, "subject_identifiers", set)
+
+
+def set_offstudy_change_uncommitted(subject_identifier: str, using: str | None = None) -> None:
+    """Adds the subject to the uncommitted subjects until the
+    transaction commits.
+
+    Called by the Offstudy model post_save/post_delete signals.
+    """
+    uncommitted_subject_identifiers = get_uncommitted_subject_identifiers(using)
+    uncommitted_subject_identifiers.add(subject_identifier)
+    transaction.on_commit(
+        lambda: uncommitted_subject_identifiers.discard(subject_identifier), using=using
+    )
+
+
+def get_trigger_name(model_cls: Type[Model]) -> str:
+    """Returns the name of the off-study trigger and trigger function
+    for the model, see `edc_offstudy.db_triggers`.
+    """
+    return truncate_name(f"edc_offstudy_{model_cls._meta.db_table}", 63)
+
+
+@lru_cache(maxsize=8)
+def get_installed_offstudy_triggers(using: str) -> frozenset[str]:
+    """Returns the names of the off-study triggers installed in this
+    PostgreSQL database, read once from `pg_trigger`.
+
+    Cleared by InstallOffstudyTrigger and the `setting_changed` signal.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT tgname FROM pg_trigger WHERE NOT tgisinternal AND tgname LIKE %s",
+            ["edc\\_offstudy\\_%"],
+        )
+        return frozenset(row[0] for row in cursor.fetchall())
+
+
+def offstudy_db_triggers_enabled(
+    using: str | None = None, model_cls: Type[Model] | None = None
+) -> bool:
+    """Returns True if off-study dates are enforced by database
+    triggers for this database, see `edc_offstudy.db_triggers`.
+
+    Requires settings.EDC_OFFSTUDY_DB_TRIGGERS=True and a PostgreSQL
+    database and, if `model_cls` is given, the model's trigger to be
+    installed. Otherwise the Python checks apply.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    if not (
+        getattr(settings, "EDC_OFFSTUDY_DB_TRIGGERS", False)
+        and connections[using].vendor == "postgresql"
+    ):
+        return False
+    return model_cls is None or get_trigger_name(model_cls) in get_installed_offstudy_triggers(
+        using
+    )
+
+
+@contextmanager
+def translate_offstudy_trigger_error(using: str | None = None):
+    """Re-raises an IntegrityError from the off-study trigger as an
+    OffstudyError.
+
+    In an atomic block the statement runs in a savepoint, so a
+    rejected row does not leave the transaction marked for rollback
+    for a caller that catches the OffstudyError and carries on.
     """
-    return django_apps.get_model(site_visit_schedules.get_offstudy_model())
+    savepoint = (
+        transaction.atomic(using=using)
+        if connections[using or DEFAULT_DB_ALIAS].in_atomic_block
+        else nullcontext()
+    )
+    try:
+        with savepoint:
+            yield
+    except IntegrityError as e:
+        if not str(e).startswith(OFFSTUDY_TRIGGER_MESSAGE_PREFIX):
+            raise
+        message = str(e).removeprefix(OFFSTUDY_TRIGGER_MESSAGE_PREFIX).splitlines()[0]
+        raise OffstudyError(message) from e
 
 
 def raise_if_offstudy(
     source_obj: Model | None = None,
     subject_identifier: str = None,
     report_datetime: datetime = None,
-) -> OffstudyModelMixin | None:
+) -> None:
     """Returns None or raises OffstudyError"""
-    obj = None
+    with instrument("raise_if_offstudy", source_obj._meta.label_lower if source_obj else None):
+        raise_if_report_datetime_after_offstudy(
+            offstudy_datetime=get_offstudy_datetime(subject_identifier),
+            source_obj=source_obj,
+            subject_identifier=subject_identifier,
+            report_datetime=report_datetime,
+        )
+
+
+async def araise_if_offstudy(
+    source_obj: Model | None = None,
+    subject_identifier: str = None,
+    report_datetime: datetime = None,
+) -> None:
+    """Async version of `raise_if_offstudy`.
+
+    Returns None or raises OffstudyError.
+    """
+    raise_if_report_datetime_after_offstudy(
+        offstudy_datetime=await aget_offstudy_datetime(subject_identifier),
+        source_obj=source_obj,
+        subject_identifier=subject_identifier,
+        report_datetime=report_datetime,
+    )
+
+
+def raise_if_report_datetime_after_offstudy(
+    offstudy_datetime: datetime | None = None,
+    source_obj: Model | None = None,
+    subject_identifier: str = None,
+    report_datetime: datetime = None,
+) -> None:
+    """Raises OffstudyError if report_datetime is after the given
+    offstudy_datetime.
+
+    For callers that already have the subject's offstudy_datetime.
+    """
+    if offstudy_datetime and offstudy_datetime < to_utc(report_datetime):
+        raise OffstudyError(
+            subject_identifier=subject_identifier,
+            report_datetime=report_datetime,
+            offstudy_datetime=offstudy_datetime,
+            source_model=source_obj._meta.label_lower if source_obj else None,
+        )
+
+
+def get_offstudy_and_offschedule_datetimes(
+    subject_identifier: str,
+    report_datetime: datetime,
+    offschedule_model_cls: Type[OffScheduleModelMixin],
+) -> tuple[datetime | None, datetime | None]:
+    """Returns a tuple of (offstudy_datetime, offschedule_datetime)
+    for the subject using one query.
+
+    offschedule_datetime is only returned if before the
+    report_datetime. Either may be None.
+
+    The offstudy_datetime is taken from the active off-study cache
+    or the shared off-study cache, if any.
+    """
+    offschedule_qs = _get_offschedule_qs(
+        subject_identifier, report_datetime, offschedule_model_cls
+    )
+    found, offstudy_datetime = _get_cached_offstudy_datetime(subject_identifier)
+    if found:
+        offschedule_datetime = offschedule_qs.values_list(
+            "offschedule_datetime", flat=True
+        ).first()
+    else:
+        datetimes = {
+            kind: dt for dt, kind in _union_offstudy_qs(subject_identifier, offschedule_qs)
+        }
+        offstudy_datetime = datetimes.get(OFFSTUDY)
+        offschedule_datetime = datetimes.get(OFFSCHEDULE)
+        _set_cached_offstudy_datetime(subject_identifier, offstudy_datetime)
+    return offstudy_datetime, offschedule_datetime
+
+
+async def aget_offstudy_and_offschedule_datetimes(
+    subject_identifier: str,
+    report_datetime: datetime,
+    offschedule_model_cls: Type[OffScheduleModelMixin],
+) -> tuple[datetime | None, datetime | None]:
+    """Async version of `get_offstudy_and_offschedule_datetimes`."""
+    offschedule_qs = _get_offschedule_qs(
+        subject_identifier, report_datetime, offschedule_model_cls
+    )
+    found, offstudy_datetime = await _aget_cached_offstudy_datetime(subject_identifier)
+    if found:
+        offschedule_datetime = await offschedule_qs.values_list(
+            "offschedule_datetime", flat=True
+        ).afirst()
+    else:
+        datetimes = {
+            kind: dt
+            async for dt, kind in _union_offstudy_qs(subject_identifier, offschedule_qs)
+        }
+        offstudy_datetime = datetimes.get(OFFSTUDY)
+        offschedule_datetime = datetimes.get(OFFSCHEDULE)
+        await _aset_cached_offstudy_datetime(subject_identifier, offstudy_datetime)
+    return offstudy_datetime, offschedule_datetime
+
+
+def _get_offschedule_qs(
+    subject_identifier: str,
+    report_datetime: datetime,
+    offschedule_model_cls: Type[OffScheduleModelMixin],
+) -> QuerySet:
+    return offschedule_model_cls.objects.filter(
+        subject_identifier=subject_identifier,
+        offschedule_datetime__lt=report_datetime,
+    )
+
+
+def _union_offstudy_qs(subject_identifier: str, offschedule_qs: QuerySet) -> QuerySet:
+    """Returns a UNION ALL of (datetime, kind) rows from the
+    offschedule queryset and the off-study lookup model.
+    """
+    offschedule_qs = (
+        offschedule_qs.annotate(kind=Value(OFFSCHEDULE, output_field=CharField()))
+        .order_by()
+        .values_list("offschedule_datetime", "kind")
+    )
+    offstudy_qs = (
+        get_offstudy_lookup_model_cls()
+        .objects.filter(subject_identifier=subject_identifier)
+        .annotate(kind=Value(OFFSTUDY, output_field=CharField()))
+        .order_by()
+        .values_list("offstudy_datetime", "kind")
+    )
+    return offschedule_qs.union(offstudy_qs, all=True)
+
+
+def get_offstudy_datetime_subquery(subject_identifier_lookup: str) -> Subquery:
+    """Returns a Subquery of the subject's offstudy_datetime for use
+    in `annotate()`, correlated on `subject_identifier_lookup` of
+    the outer query.
+
+    For example, for a CRF:
+        CrfOne.objects.annotate(
+            offstudy_datetime=get_offstudy_datetime_subquery(
+                "subject_visit__subject_identifier"
+            )
+        )
+    """
+    return Subquery(
+        get_offstudy_lookup_model_cls()
+        .objects.filter(subject_identifier=OuterRef(subject_identifier_lookup))
+        .order_by()
+        .values("offstudy_datetime")[:1]
+    )
+
+
+def get_offstudy_datetimes(
+    subject_identifiers: Iterable[str], chunk_size: int | None = None
+) -> dict[str, datetime]:
+    """Returns a dictionary of {subject_identifier: offstudy_datetime}
+    for those subjects in `subject_identifiers` that are off study.
+
+    Subjects not off study are not included. Lookups are done in
+    chunks of `chunk_size` using an `IN` query on the Offstudy model.
+    """
+    offstudy_datetimes = {}
+    for queryset in _get_offstudy_datetimes_qs(subject_identifiers, chunk_size):
+        offstudy_datetimes.update(queryset)
+    return offstudy_datetimes
+
+
+async def aget_offstudy_datetimes(
+    subject_identifiers: Iterable[str], chunk_size: int | None = None
+) -> dict[str, datetime]:
+    """Async version of `get_offstudy_datetimes`."""
+    offstudy_datetimes = {}
+    for queryset in _get_offstudy_datetimes_qs(subject_identifiers, chunk_size):
+        offstudy_datetimes.update({s: dt async for s, dt in queryset})
+    return offstudy_datetimes
+
+
+def _get_offstudy_datetimes_qs(
+    subject_identifiers: Iterable[str], chunk_size: int | None = None
+) -> Iterator[QuerySet]:
+    """Yields a queryset of (subject_identifier, offstudy_datetime)
+    per chunk of `subject_identifiers`.
+    """
+    chunk_size = chunk_size or OFFSTUDY_LOOKUP_CHUNK_SIZE
+    subject_identifiers = sorted({s for s in subject_identifiers if s})
+    model_cls = get_offstudy_lookup_model_cls()
+    for index in range(0, len(subject_identifiers), chunk_size):
+        yield model_cls.objects.filter(
+            subject_identifier__in=subject_identifiers[index : index + chunk_size]
+        ).values_list("subject_identifier", "offstudy_datetime")
+
+
+def get_offstudy_objs(
+    subject_identifiers: Iterable[str],
+    offstudy_model: str | None = None,
+    chunk_size: int | None = None,
+) -> dict[str, OffstudyModelMixin]:
+    """Returns a dictionary of {subject_identifier: offstudy model
+    instance} for those subjects in `subject_identifiers` that are
+    off study.
+
+    Use to prefetch off-study instances for a page of subjects,
+    e.g. for the `offstudy_visit_schedule_row` templatetag.
+    `offstudy_model` defaults to the Offstudy model of the
+    registered visit schedules.
+    """
+    chunk_size = chunk_size or OFFSTUDY_LOOKUP_CHUNK_SIZE
+    subject_identifiers = sorted({s for s in subject_identifiers if s})
+    model_cls = (
+        django_apps.get_model(offstudy_model) if offstudy_model else get_offstudy_model_cls()
+    )
+    offstudy_objs = {}
+    for index in range(0, len(subject_identifiers), chunk_size):
+        offstudy_objs.update(
+            {
+                obj.subject_identifier: obj
+                for obj in model_cls.objects.filter(
+                    subject_identifier__in=subject_identifiers[index : index + chunk_size]
+                )
+            }
+        )
+    return offstudy_objs
+
+
+def find_offstudy_violations(
+    rows: Iterable[tuple[str, datetime, ...]], chunk_size: int | None = None
+) -> list[tuple[str, datetime, ...]]:
+    """Returns the rows where the subject is off study by the
+    report_datetime.
+
+    Batch companion to `raise_if_offstudy`. Each row is a tuple
+    of (subject_identifier, report_datetime, ...). Any additional
+    items in a row, e.g. a pk, are ignored and returned as is.
+    """
+    rows = [row for row in rows if row[0] and row[1]]
+    offstudy_datetimes = get_offstudy_datetimes(
+        [row[0] for row in rows], chunk_size=chunk_size
+    )
+    return _filter_violations(rows, offstudy_datetimes)
+
+
+async def afind_offstudy_violations(
+    rows: Iterable[tuple[str, datetime, ...]], chunk_size: int | None = None
+) -> list[tuple[str, datetime, ...]]:
+    """Async version of `find_offstudy_violations`."""
+    rows = [row for row in rows if row[0] and row[1]]
+    offstudy_datetimes = await aget_offstudy_datetimes(
+        [row[0] for row in rows], chunk_size=chunk_size
+    )
+    return _filter_violations(rows, offstudy_datetimes)
+
+
+def _filter_violations(
+    rows: list[tuple[str, datetime, ...]], offstudy_datetimes: dict[str, datetime]
+) -> list[tuple[str, datetime, ...]]:
+    return [
+        row
+        for row in rows
+        if row[0] in offstudy_datetimes and offstudy_datetimes[row[0]] < to_utc(row[1])
+    ]
+
+
+def _get_related_visit_field(model_cls: Type[Model]) -> ForeignKey | None:
+    """Returns the foreign key to the related visit or None if the
+    model has a subject_identifier field or no related visit.
+    """
+    from edc_visit_tracking.exceptions import RelatedVisitFieldError
+    from edc_visit_tracking.model_mixins import get_related_visit_model_attr
+
+    if "subject_identifier" in [f.name for f in model_cls._meta.concrete_fields]:
+        return None
     try:
-        with transaction.atomic():
-            obj = get_offstudy_model_cls().objects.get(
-                subject_identifier=subject_identifier,
-                offstudy_datetime__lt=to_utc(report_datetime),
+        return model_cls._meta.get_field(get_related_visit_model_attr(model_cls))
+    except RelatedVisitFieldError:
+        return None
+
+
+def get_subject_identifiers_for_objs(
+    objs: list[Model], chunk_size: int | None = None
+) -> list[str | None]:
+    """Returns the subject identifier of each model instance.
+
+    CRFs get subject_identifier through the related visit. Visits
+    not already attached to the instance are read with one `IN`
+    query on the visit model per chunk, by the `<visit>_id` column,
+    instead of one query per instance.
+    """
+    chunk_size = chunk_size or OFFSTUDY_LOOKUP_CHUNK_SIZE
+    visit_fields = {}
+    for obj in objs:
+        model_cls = obj.__class__
+        if model_cls not in visit_fields:
+            visit_fields[model_cls] = _get_related_visit_field(model_cls)
+    visit_ids = {}
+    for obj in objs:
+        field = visit_fields[obj.__class__]
+        if field and not field.is_cached(obj) and getattr(obj, field.attname):
+            visit_ids.setdefault(field.related_model, set()).add(getattr(obj, field.attname))
+    visit_subject_identifiers = {}
+    for visit_model_cls, ids in visit_ids.items():
+        ids = list(ids)
+        for index in range(0, len(ids), chunk_size):
+            visit_subject_identifiers.update(
+                {
+                    (visit_model_cls, pk): subject_identifier
+                    for pk, subject_identifier in visit_model_cls.objects.filter(
+                        pk__in=ids[index : index + chunk_size]
+                    ).values_list("pk", "subject_identifier")
+                }
             )
-    except ObjectDoesNotExist:
-        pass
-    else:
-        msg_part = f"Source model `{source_obj._meta.verbose_name}`." if source_obj else ""
-        raise OffstudyError(
-            "Subject off study by given date/time. "
-            f"Got report_datetime=`{formatted_datetime(report_datetime)}` "
-            f"while the offstudy date is `{formatted_datetime(obj.offstudy_datetime)}` "
-            f"Subject {subject_identifier}. {msg_part} "
-            f"See also '{get_offstudy_model_cls()._meta.verbose_name}'."
+    subject_identifiers = []
+    for obj in objs:
+        field = visit_fields[obj.__class__]
+        if not field:
+            subject_identifiers.append(obj.subject_identifier)
+        elif field.is_cached(obj):
+            related_visit = getattr(obj, field.name)
+            subject_identifiers.append(
+                related_visit.subject_identifier if related_visit else None
+            )
+        else:
+            subject_identifiers.append(
+                visit_subject_identifiers.get(
+                    (field.related_model, getattr(obj, field.attname))
+                )
+            )
+    return subject_identifiers
+
+
+def raise_if_offstudy_for_objs(objs: Iterable[Model]) -> None:
+    """Raises an OffstudyBatchError listing every model instance
+    reported after the subject's off-study datetime.
+
+    Batch companion to `raise_if_offstudy` for unsaved instances.
+    Each instance must have attributes `subject_identifier` and
+    `report_datetime`. See also `get_subject_identifiers_for_objs`.
+    """
+    objs = list(objs)
+    rows = [
+        (subject_identifier, obj.report_datetime, obj)
+        for subject_identifier, obj in zip(get_subject_identifiers_for_objs(objs), objs)
+        if subject_identifier and obj.report_datetime
+    ]
+    offstudy_datetimes = get_offstudy_datetimes([row[0] for row in rows])
+    violations = _filter_violations(rows, offstudy_datetimes)
+    if violations:
+        raise OffstudyBatchError(
+            objs=[obj for _, _, obj in violations],
+            errors=[
+                OffstudyError(
+                    subject_identifier=subject_identifier,
+                    report_datetime=report_datetime,
+                    offstudy_datetime=offstudy_datetimes[subject_identifier],
+                    source_model=obj._meta.label_lower,
+                )
+                for subject_identifier, report_datetime, obj in violations
+            ],
         )
-    return obj